@@ -12,3 +12,7 @@ config_name = os.getenv('FLASK_CONFIG', 'default')
 app.config.from_object(config[config_name])
 
 from app import routes
+
+if app.config['INSTRUMENTATION']:
+    from app.instrumentation import install
+    install(app)
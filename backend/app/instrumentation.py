@@ -0,0 +1,251 @@
+"""Opt-in instrumentation of the point arithmetic and the API.
+
+Nothing here runs unless `install` is called, which the app only does when
+the INSTRUMENTATION setting is on, so disabled instrumentation costs
+nothing. Once installed:
+
+- Point additions, doublings and modular inversions are counted and the
+  service calls of Curve and Point are timed, per request.
+- Every response carries a Server-Timing header with those timers and
+  counters. Streamed responses are buffered to time their serialization.
+- /api/metrics exposes per-route latency histograms and operation totals
+  in the Prometheus text format, for this process.
+- A request with an X-Profile header is profiled with cProfile, or with
+  pyinstrument when the header says so and it is installed, and the
+  profile is written to PROFILE_DIR.
+"""
+import os
+import time
+import cProfile
+import threading
+from functools import wraps
+from flask import Response, request
+
+from app.services import point_service
+from app.services.point_service import Point, FixedBasePoint
+from app.services.point_batch import PointBatch
+from app.services.curve_service import Curve
+
+# Upper bounds in seconds of the latency histogram buckets
+LATENCY_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10]
+PROFILE_HEADER = "X-Profile"
+
+# Counted operations: name in Server-Timing and description
+OPERATIONS = {
+    "add": "Point additions",
+    "double": "Point doublings",
+    "inverse": "Modular inversions",
+}
+# Timed service calls and the name they are reported with
+SERVICE_CALLS = [
+    (Curve, "order", "order"),
+    (Curve, "calculate_points", "points"),
+    (Curve, "encode", "encode"),
+    (Curve, "decode", "decode"),
+    (Curve, "encrypt", "encrypt"),
+    (Curve, "decrypt", "decrypt"),
+    (Point, "__mul__", "mul"),
+    (FixedBasePoint, "__mul__", "mul"),
+]
+SERVICE_GENERATORS = [
+    (Curve, "iter_points", "points"),
+    (Curve, "steps", "steps"),
+]
+
+_state = threading.local()
+_lock = threading.Lock()
+_totals = dict.fromkeys(OPERATIONS, 0)
+_latencies = {}
+
+
+def _count(operation: str, amount: int = 1) -> None:
+    counts = getattr(_state, "counts", None)
+    if counts is not None:
+        counts[operation] += amount
+
+
+def _add_time(name: str, elapsed: int) -> None:
+    timers = getattr(_state, "timers", None)
+    if timers is not None:
+        timers[name] = timers.get(name, 0) + elapsed
+
+
+def _counted(function, operation: str, amount=None):
+    @wraps(function)
+    def wrapper(*args):
+        _count(operation, amount(*args) if amount else 1)
+        return function(*args)
+
+    return wrapper
+
+
+def _timed(function, name: str):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        active = getattr(_state, "active", None)
+        # Nested calls of the same kind, like FixedBasePoint falling back
+        # to Point.__mul__, are part of the outer call.
+        if active is None or name in active:
+            return function(*args, **kwargs)
+        active.add(name)
+        start = time.perf_counter_ns()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            _add_time(name, time.perf_counter_ns() - start)
+            active.discard(name)
+
+    return wrapper
+
+
+def _timed_generator(function, name: str):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        iterator = function(*args, **kwargs)
+        while True:
+            start = time.perf_counter_ns()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                _add_time(name, time.perf_counter_ns() - start)
+            yield item
+
+    return wrapper
+
+
+def _instrument_services() -> None:
+    point_service._jacobian_add = _counted(point_service._jacobian_add, "add")
+    point_service._jacobian_double = _counted(point_service._jacobian_double, "double")
+    point_service.mod_inverse = _counted(point_service.mod_inverse, "inverse")
+    point_service.batch_inverse = _counted(point_service.batch_inverse, "inverse")
+    Point.__add__ = _counted(Point.__add__, "add")
+    PointBatch.__add__ = _counted(PointBatch.__add__, "add", lambda batch, other: len(batch))
+    for owner, attribute, name in SERVICE_CALLS:
+        setattr(owner, attribute, _timed(owner.__dict__[attribute], name))
+    for owner, attribute, name in SERVICE_GENERATORS:
+        setattr(owner, attribute, _timed_generator(owner.__dict__[attribute], name))
+
+
+def _start_request() -> None:
+    _state.counts = dict.fromkeys(OPERATIONS, 0)
+    _state.timers = {}
+    _state.active = set()
+    _state.start = time.perf_counter_ns()
+    _state.profiler = None
+    profile = request.headers.get(PROFILE_HEADER)
+    if profile:
+        _state.profiler = _profiler(profile)
+        _state.profiler.start()
+
+
+def _profiler(kind: str):
+    if kind.lower() == "pyinstrument":
+        try:
+            from pyinstrument import Profiler
+
+            return Profiler()
+        except ImportError:
+            pass
+    return _CProfiler()
+
+
+class _CProfiler:
+    """cProfile behind the start / stop interface of pyinstrument."""
+
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+
+    def start(self) -> None:
+        self.profile.enable()
+
+    def stop(self) -> None:
+        self.profile.disable()
+
+
+def _dump_profile(profiler, directory: str) -> str:
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{request.endpoint or 'request'}"
+    if isinstance(profiler, _CProfiler):
+        path = os.path.join(directory, f"{name}-{threading.get_ident()}.prof")
+        profiler.profile.dump_stats(path)
+    else:
+        path = os.path.join(directory, f"{name}-{threading.get_ident()}.html")
+        with open(path, "w") as file:
+            file.write(profiler.output_html())
+    return path
+
+
+def _finish_request(response: "Response", profile_dir: str) -> "Response":
+    if getattr(_state, "counts", None) is None:
+        return response
+    if response.is_streamed:
+        start = time.perf_counter_ns()
+        response.make_sequence()
+        _add_time("serialize", time.perf_counter_ns() - start)
+    elapsed = time.perf_counter_ns() - _state.start
+
+    if _state.profiler is not None:
+        _state.profiler.stop()
+        response.headers["X-Profile-File"] = os.path.basename(
+            _dump_profile(_state.profiler, profile_dir)
+        )
+
+    timings = [f"{name};dur={ns / 1e6:.3f}" for name, ns in _state.timers.items()]
+    timings.append(f"total;dur={elapsed / 1e6:.3f}")
+    timings += [
+        f'{operation};desc="{count}"' for operation, count in _state.counts.items()
+    ]
+    response.headers["Server-Timing"] = ", ".join(timings)
+
+    route = request.url_rule.rule if request.url_rule else "unmatched"
+    with _lock:
+        for operation, count in _state.counts.items():
+            _totals[operation] += count
+        histogram = _latencies.setdefault(
+            (route, request.method), [[0] * len(LATENCY_BUCKETS), 0.0, 0]
+        )
+        for i, bound in enumerate(LATENCY_BUCKETS):
+            if elapsed / 1e9 <= bound:
+                histogram[0][i] += 1
+        histogram[1] += elapsed / 1e9
+        histogram[2] += 1
+    _state.counts = None
+    return response
+
+
+def metrics() -> str:
+    """Metrics of this process in the Prometheus text format."""
+    lines = []
+    with _lock:
+        for operation, description in OPERATIONS.items():
+            metric = f"pandora_point_{operation}_total"
+            lines.append(f"# HELP {metric} {description} while serving requests.")
+            lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric} {_totals[operation]}")
+
+        metric = "pandora_request_duration_seconds"
+        lines.append(f"# HELP {metric} Latency of the API requests.")
+        lines.append(f"# TYPE {metric} histogram")
+        for (route, method), (buckets, total, count) in sorted(_latencies.items()):
+            labels = f'route="{route}",method="{method}"'
+            for bound, bucket in zip(LATENCY_BUCKETS, buckets):
+                lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {bucket}')
+            lines.append(f'{metric}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{metric}_sum{{{labels}}} {total}")
+            lines.append(f"{metric}_count{{{labels}}} {count}")
+    return "\n".join(lines) + "\n"
+
+
+def install(app) -> None:
+    """Instrument the services and register the hooks and /api/metrics."""
+    _instrument_services()
+    profile_dir = app.config["PROFILE_DIR"]
+    app.before_request(_start_request)
+    app.after_request(lambda response: _finish_request(response, profile_dir))
+    app.add_url_rule(
+        "/api/metrics",
+        "metrics",
+        lambda: Response(metrics(), mimetype="text/plain; version=0.0.4"),
+    )
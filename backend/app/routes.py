@@ -1,19 +1,47 @@
 import re
-import json
 import uuid
+import random
+import secrets
 from flask import request, jsonify
 
 from app import app
 from app.services.point_service import Point
 from app.services.curve_service import Curve
-from app.services.setup import Setup
-from app.services.pohlig_hellman import PohligHellman
-from app.services.baby_step_giant_step import BabyStepGiantStep
-
-ecc = {}
+from app.services.benchmark_executor import (
+    ATTACKS,
+    CACHED_ATTACKS,
+    SEEDED_ATTACKS,
+    BenchmarkExecutor,
+    attack_work,
+    catalogue_spec,
+)
+from app.services.curve_catalogue import catalogue
+from app.services.benchmark_jobs import CANCELLED, BenchmarkJobManager
+from app.services.session_store import create_session_store
+from app.serialization import wire_format, parse_pair, parse_point, respond
+
+ecc = create_session_store(app.config)
+executor = BenchmarkExecutor(app.config["BENCHMARK_WORKERS"])
+# Jobs get a pool of their own, so a long job does not hold up synchronous
+# benchmarks queued behind it.
+jobs = BenchmarkJobManager(
+    BenchmarkExecutor(app.config["BENCHMARK_JOB_WORKERS"]),
+    app.config["BENCHMARK_JOB_RETENTION"],
+)
 
 CURVE_NOT_FOUND = "Curve not found"
 BASE_NOT_SET = "Base point not set"
+JOB_NOT_FOUND = "Benchmark job not found"
+
+
+def steps_page(data: dict, scalar: int) -> tuple:
+    """Return the offset, limit and next offset of the requested steps page."""
+    steps_limit = app.config["STEPS_LIMIT"]
+    offset = max(int(data.get("stepsOffset", 0)), 0)
+    limit = min(max(int(data.get("stepsLimit", steps_limit)), 1), steps_limit)
+    next_offset = offset + limit if offset + limit < scalar else None
+    return offset, limit, next_offset
+
 
 @app.route("/api/uid", methods=["GET"])
 def generate_uid():
@@ -52,10 +80,42 @@ def generate_curve():
 def calculate_points():
     try:
         uid = request.args.get("uid")
-        if uid not in ecc:
+        curve = ecc.get(uid)
+        if curve is None:
             return jsonify(CURVE_NOT_FOUND), 404
-        points = [point.to_json() for point in ecc[uid].points]
-        return jsonify({"message": "Points calculated", "points": points}), 200
+        page_limit = app.config["POINTS_PAGE_LIMIT"]
+        start = int(request.args.get("start", 0))
+        limit = min(int(request.args.get("limit", page_limit)), page_limit)
+        if start < 0 or limit < 1:
+            return jsonify("Invalid start or limit"), 400
+        fmt = wire_format(request)
+        points = curve.iter_points(start)
+        cursor = []
+
+        # The page is streamed point by point and holds the points of the
+        # x values from `start` on. It ends before an x whose points do not
+        # all fit, so they are never split between pages; a single x with
+        # more than `limit` points is sent whole. "next" is the x the
+        # following page starts at, or null once every point has been sent.
+        def page():
+            group, sent = [], 0
+            for point in points:
+                if group and point.x != group[0].x:
+                    yield from group
+                    sent, group = sent + len(group), []
+                if sent and sent + len(group) >= limit:
+                    cursor.append(group[0].x if group else point.x)
+                    return
+                group.append(point)
+            yield from group
+
+        response = {
+            "message": "Points calculated",
+            "points": page(),
+            "start": start,
+            "next": lambda: cursor[0] if cursor else None,
+        }
+        return respond(response, fmt)
     except Exception as e:
         return jsonify(str(e)), 400
 
@@ -65,9 +125,11 @@ def set_base():
     try:
         data = request.get_json()
         uid = data["uid"]
-        if uid not in ecc:
+        curve = ecc.get(uid)
+        if curve is None:
             return jsonify(CURVE_NOT_FOUND), 404
-        ecc[uid].base = Point(ecc[uid], data["x"], data["y"])
+        curve.base = Point(curve, data["x"], data["y"])
+        ecc[uid] = curve
         return jsonify("Base point set"), 200
     except KeyError as e:
         return jsonify(f"Missing key: {str(e)}"), 400
@@ -79,14 +141,13 @@ def set_base():
 def get_public_keys():
     try:
         uid = request.args.get("uid")
-        if uid not in ecc:
+        curve = ecc.get(uid)
+        if curve is None:
             return jsonify(CURVE_NOT_FOUND), 404
-        public_keys = ecc[uid].public_keys.copy()
-        for key in public_keys:
-            public_keys[key] = public_keys[key].to_json()
-        return (
-            jsonify({"message": "Public keys retrieved", "public_keys": public_keys}),
-            200,
+        public_keys = curve.public_keys.copy()
+        return respond(
+            {"message": "Public keys retrieved", "public_keys": public_keys},
+            wire_format(request),
         )
     except Exception as e:
         return jsonify(str(e)), 400
@@ -97,25 +158,27 @@ def public_k():
     try:
         data = request.get_json()
         uid = data["uid"]
-        if uid not in ecc:
+        curve = ecc.get(uid)
+        if curve is None:
             return jsonify(CURVE_NOT_FOUND), 404
-        if not ecc[uid].base:
+        if not curve.base:
             return jsonify(BASE_NOT_SET), 404
 
         private_k, i = int(data["privateKey"]), data["i"]
-        public_k = ecc[uid].base * private_k
+        public_k = curve.base * private_k
         if public_k.at_infinity():
             return jsonify({}), 204
 
-        ecc[uid].public_keys[f"{i}"] = public_k
-        steps = [p.to_json() for p in ecc[uid].steps(ecc[uid].base, private_k)]
+        curve.public_keys[f"{i}"] = public_k
+        ecc[uid] = curve
+        offset, limit, next_offset = steps_page(data, private_k)
         response = {
             "message": "Public key generated",
-            "public_key": public_k.to_json(),
-            "steps": steps,
+            "public_key": public_k,
+            "steps": curve.steps(curve.base, private_k, offset, limit),
+            "steps_next": next_offset,
         }
-
-        return (jsonify(response), 200)
+        return respond(response, wire_format(request))
     except Exception as e:
         return jsonify(str(e)), 400
 
@@ -125,25 +188,26 @@ def shared_key():
     try:
         data = request.get_json()
         uid = data["uid"]
-        if uid not in ecc:
+        curve = ecc.get(uid)
+        if curve is None:
             return jsonify(CURVE_NOT_FOUND), 404
-        if not ecc[uid].base:
+        if not curve.base:
             return jsonify(BASE_NOT_SET), 404
 
         private_k = int(data["privateKey"])
-        shared_key_json = json.loads(data["sharedKey"])
-        public_k = Point(ecc[uid], shared_key_json["x"], shared_key_json["y"])
+        public_k = parse_point(curve, data["sharedKey"])
         shared_key = public_k * private_k
         if shared_key.at_infinity():
             return jsonify({}), 204
 
-        steps = [p.to_json() for p in ecc[uid].steps(public_k, private_k)]
+        offset, limit, next_offset = steps_page(data, private_k)
         response = {
             "message": "Shared key generated",
-            "shared_key": shared_key.to_json(),
-            "steps": steps,
+            "shared_key": shared_key,
+            "steps": curve.steps(public_k, private_k, offset, limit),
+            "steps_next": next_offset,
         }
-        return jsonify(response), 200
+        return respond(response, wire_format(request))
     except Exception as e:
         return jsonify(str(e)), 400
 
@@ -153,21 +217,19 @@ def encode():
     try:
         data = request.get_json()
         uid = data["uid"]
-        if uid not in ecc:
+        curve = ecc.get(uid)
+        if curve is None:
             return jsonify(CURVE_NOT_FOUND), 404
-        if not ecc[uid].base:
+        if not curve.base:
             return jsonify(BASE_NOT_SET), 404
 
         if "alphabet" not in data or "message" not in data:
             return jsonify("Missing key: alphabet or message"), 400
 
         alphabet, message = data["alphabet"], data["message"]
-        encoded = ecc[uid].encode(alphabet, message)
-        response = {
-            "message": "Message encoded",
-            "encoded": [point.to_json() for point in encoded],
-        }
-        return jsonify(response), 200
+        encoded = curve.encode(alphabet, message)
+        response = {"message": "Message encoded", "encoded": encoded}
+        return respond(response, wire_format(request))
     except Exception as e:
         return jsonify(str(e)), 400
 
@@ -177,9 +239,10 @@ def encrypt():
     try:
         data = request.get_json()
         uid = data["uid"]
-        if uid not in ecc:
+        curve = ecc.get(uid)
+        if curve is None:
             return jsonify(CURVE_NOT_FOUND), 404
-        if not ecc[uid].base:
+        if not curve.base:
             return jsonify(BASE_NOT_SET), 404
 
         if "alphabet" not in data or "message" not in data:
@@ -189,25 +252,61 @@ def encrypt():
 
         # Multiple receivers case
         if "encrypt" in data and "decrypt" in data:
-            encrypt_json = json.loads(data["encrypt"])
-            decrypt_json = json.loads(data["decrypt"])
-            encrypt = Point(ecc[uid], encrypt_json["x"], encrypt_json["y"])
-            decrypt = Point(ecc[uid], decrypt_json["x"], decrypt_json["y"])
-            encrypted = ecc[uid].encrypt(alphabet, message, encrypt, decrypt, True)
-            encrypted = [point.to_json() for point in encrypted]
+            encrypt = parse_point(curve, data["encrypt"])
+            decrypt = parse_point(curve, data["decrypt"])
+            encrypted = curve.encrypt(alphabet, message, encrypt, decrypt, True)
         # Single receiver case
         elif "publicKey" in data and "privateKey" in data:
             private_k = int(data["privateKey"])
-            parsed = json.loads(data["publicKey"])
-            public_k = Point(ecc[uid], parsed["x"], parsed["y"])
-            encrypted = ecc[uid].encrypt(alphabet, message, private_k, public_k)
-            encrypted = [point[0].to_json() for point in encrypted]
+            public_k = parse_point(curve, data["publicKey"])
+            encrypted = curve.encrypt(alphabet, message, private_k, public_k)
+            encrypted = [point[0] for point in encrypted]
 
         response = {
             "message": "Message encrypted",
             "encrypted": encrypted,
         }
-        return jsonify(response), 200
+        return respond(response, wire_format(request))
+    except Exception as e:
+        return jsonify(str(e)), 400
+
+
+@app.route("/api/curve/encrypt/bulk", methods=["POST"])
+def encrypt_bulk():
+    try:
+        data = request.get_json()
+        uid = data["uid"]
+        curve = ecc.get(uid)
+        if curve is None:
+            return jsonify(CURVE_NOT_FOUND), 404
+        if not curve.base:
+            return jsonify(BASE_NOT_SET), 404
+
+        if "alphabet" not in data or "messages" not in data:
+            return jsonify("Missing key: alphabet or messages"), 400
+        if "privateKey" not in data or "publicKeys" not in data:
+            return jsonify("Missing key: privateKey or publicKeys"), 400
+
+        alphabet, messages = data["alphabet"], data["messages"]
+        if not isinstance(messages, list) or not all(isinstance(msg, str) for msg in messages):
+            return jsonify("Invalid messages. Format: [message1, message2, ...]"), 400
+        recipients = [parse_point(curve, key) for key in data["publicKeys"]]
+        if not recipients:
+            return jsonify("Invalid public keys. At least one is required"), 400
+        limit = app.config["ENCRYPT_BULK_LIMIT"]
+        if sum(len(msg) for msg in messages) * len(recipients) > limit:
+            return jsonify(f"Too many points to encrypt! At most {limit} per request."), 400
+
+        private_k = int(data["privateKey"])
+        public_k, encrypted = curve.encrypt_bulk(alphabet, messages, private_k, recipients)
+
+        # encrypted[i][j] is message j encrypted for the recipient publicKeys[i]
+        response = {
+            "message": "Messages encrypted",
+            "publicKey": public_k,
+            "encrypted": encrypted,
+        }
+        return respond(response, wire_format(request))
     except Exception as e:
         return jsonify(str(e)), 400
 
@@ -217,34 +316,111 @@ def decrypt():
     try:
         data = request.get_json()
         uid = data["uid"]
-        if uid not in ecc:
+        curve = ecc.get(uid)
+        if curve is None:
             return jsonify(CURVE_NOT_FOUND), 404
-        if not ecc[uid].base:
+        if not curve.base:
             return jsonify(BASE_NOT_SET), 404
 
         if "alphabet" not in data or "encrypted" not in data:
             return jsonify("Missing key: alphabet or encrypted"), 400
 
         points_pattern = r"\(\s*(\d+)\s*,\s*(\d+)\s*\)"
-        alphabet, encrypted_points = data["alphabet"], [(int(x), int(y)) for x, y in re.findall(points_pattern, data["encrypted"])]
+        alphabet = data["alphabet"]
+        # Compact clients send the points as a list of [x, y] pairs
+        if isinstance(data["encrypted"], list):
+            encrypted_points = [parse_pair(point) for point in data["encrypted"]]
+        else:
+            encrypted_points = [(int(x), int(y)) for x, y in re.findall(points_pattern, data["encrypted"])]
         if not encrypted_points:
             return jsonify("Invalid encrypted message. Format: [(x1, y1), (x2, y2), ...]"), 400
         encrypted = [
-            Point(ecc[uid], int(x), int(y))
+            Point(curve, int(x), int(y))
             for x, y in encrypted_points
         ]
 
         private_k = int(data["privateKey"])
-        public_k = json.loads(data["publicKey"])
-        public_k = Point(ecc[uid], int(public_k["x"]), int(public_k["y"]))
+        public_k = parse_point(curve, data["publicKey"])
 
-        decrypted = ecc[uid].decrypt(alphabet, encrypted, private_k, public_k)
+        decrypted = curve.decrypt(alphabet, encrypted, private_k, public_k)
 
         response = {"message": "Message decrypted", "decrypted": decrypted}
         return jsonify(response), 200
     except Exception as e:
         return jsonify(str(e)), 400
 
+@app.route("/api/catalogue", methods=["GET"])
+def curve_catalogue():
+    try:
+        curves = catalogue(app.config["CURVE_CATALOGUE"])
+        response = {"curves": [entry.to_dict() for entry in curves.values()]}
+        return jsonify(response), 200
+    except Exception as e:
+        return jsonify(str(e)), 400
+
+
+def benchmark_specs(data: dict) -> list:
+    """Parse the curves of a benchmark request into picklable specifications."""
+    algorithm = data["attackType"]
+    # Points drawn for catalogue curves follow the seed when there is one
+    rng = random.Random(data["seed"]) if data.get("seed") is not None else secrets.SystemRandom()
+    specs = []
+    for i in range(min(data["numCurves"], 100)):
+        params = catalogue_spec(
+            algorithm, data["params"][i], rng, app.config["CURVE_CATALOGUE"]
+        )
+        spec = {
+            "a": int(params["a"]),
+            "b": int(params["b"]),
+            "field": int(params["field"]),
+            "n": int(params["n"]),
+            "base": parse_pair(params["base"]),
+        }
+        if algorithm != "SETUP":
+            spec["point_a"] = parse_pair(params["point_a"])
+        if algorithm == "Baby-Step Giant-Step":
+            spec["m"] = int(params["m"])
+        elif algorithm == "Pollard's Kangaroo":
+            spec["lower"] = int(params.get("lower", 0))
+            spec["upper"] = int(params.get("upper", spec["n"] - 1))
+        if algorithm == "Pohlig-Hellman" and params.get("factors"):
+            spec["factors"] = {int(q): int(e) for q, e in dict(params["factors"]).items()}
+        # Refused up front: a try beyond the bound would hold a worker for
+        # hours, as on the 256-bit curves of the catalogue
+        work_limit = app.config["ATTACK_WORK_LIMIT"]
+        if attack_work(algorithm, spec) > work_limit:
+            raise ValueError(
+                f"Curve {i + 1} is out of reach of {algorithm}! A try would take"
+                f" more than {work_limit} group operations."
+            )
+        specs.append(spec)
+    return specs
+
+
+def benchmark_options(algorithm: str, data: dict) -> dict:
+    options = {}
+    if algorithm == "Baby-Step Giant-Step":
+        options["memory_budget"] = app.config["BSGS_MEMORY_BUDGET"]
+    if "warmup" in data:
+        options["warmup"] = int(data["warmup"])
+    if data.get("seed") is not None and algorithm in SEEDED_ATTACKS:
+        options["seed"] = int(data["seed"])
+    if "cache" in data and algorithm in CACHED_ATTACKS:
+        options["cache"] = bool(data["cache"])
+    return options
+
+
+def benchmark_result(i: int, spec: dict, result) -> dict:
+    return {
+        "curve": str(i + 1),
+        "a" : spec["a"],
+        "b" : spec["b"],
+        "field" : spec["field"],
+        "failures": result.tries - result.successes,
+        **result.to_dict(),
+    }
+
+
 @app.route("/api/benchmark", methods=["POST"])
 def benchmark():
     try:
@@ -253,57 +429,86 @@ def benchmark():
         if "attackType" not in data:
             return jsonify("Missing key: attackType"), 400
 
-        num_curves = data["numCurves"]
-        restricted_num_curves = min(num_curves, 100)
+        algorithm = data["attackType"]
+        if algorithm not in ATTACKS:
+            return jsonify("Invalid algorithm"), 400
         numTests = data["numTests"]
+        specs = benchmark_specs(data)
+
+        benchmark = executor.run(
+            algorithm, specs, numTests, **benchmark_options(algorithm, data)
+        )
+        results = [
+            benchmark_result(i, spec, benchmark[i]) for i, spec in enumerate(specs)
+        ]
+        return jsonify({"message": "Benchmark completed", "results": results}), 200
+    except Exception as e:
+        return jsonify(str(e)), 400
+
+
+def job_response(job) -> dict:
+    results = [
+        benchmark_result(i, spec, result)
+        for i, (spec, result) in enumerate(zip(job.specs, job.results))
+        if result is not None
+    ]
+    return {
+        "job": job.id,
+        "attackType": job.algorithm,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "results": results,
+    }
+
+
+@app.route("/api/benchmark/jobs", methods=["POST"])
+def create_benchmark_job():
+    try:
+        data = request.get_json()
+
+        if "attackType" not in data:
+            return jsonify("Missing key: attackType"), 400
 
-        curves = []
         algorithm = data["attackType"]
-        for i in range(restricted_num_curves):
-            params = data["params"][i]
-            curve = Curve(int(params["a"]), int(params["b"]), int(params["field"]))
-            base = json.loads(params["base"])
-            curve.base = Point(curve, int(base["x"]), int(base["y"]))
-            curve.n = int(params["n"])
-            if algorithm == "Pohlig-Hellman":
-                point_a = json.loads(params["point_a"])
-                point_a = Point(curve, int(point_a["x"]), int(point_a["y"]))
-                curves.append((curve, point_a))
-            elif  algorithm == "Baby-Step Giant-Step":
-                point_a = json.loads(params["point_a"])
-                point_a = Point(curve, int(point_a["x"]), int(point_a["y"]))
-                m = int(params["m"])
-                curves.append((curve, point_a, m))
-            else:
-                curves.append(curve)
-
-        results = []
-        if algorithm == "SETUP":
-            benchmark = Setup.benchmark(curves, numTests)
-        elif algorithm == "Pohlig-Hellman":
-            benchmark = PohligHellman.benchmark(curves, numTests)
-        elif algorithm == "Baby-Step Giant-Step":
-            benchmark = BabyStepGiantStep.benchmark(curves, numTests)
-        else:
+        if algorithm not in ATTACKS:
             return jsonify("Invalid algorithm"), 400
-        for i, _ in enumerate(curves):
-            if algorithm == "Pohlig-Hellman" or algorithm == "Baby-Step Giant-Step":
-                curve = curves[i][0]
-            else:
-                curve = curves[i]
-            success_count = benchmark[i][0]
-            rate = benchmark[i][1]
-            elapsed_time = benchmark[i][2]
-            results.append({
-                "curve": str(i + 1),
-                "a" : curve.a,
-                "b" : curve.b,
-                "field" : curve.field,
-                "successes": success_count,
-                "failures": numTests - success_count,
-                "rate": rate,
-                "time": elapsed_time,
-            })
-        return jsonify({"message": "Benchmark completed", "results": results}), 200
+        specs = benchmark_specs(data)
+        job = jobs.submit(
+            algorithm, specs, data["numTests"], **benchmark_options(algorithm, data)
+        )
+        return jsonify({"message": "Benchmark job created", "job": job.id}), 202
+    except KeyError as e:
+        return jsonify(f"Missing key: {str(e)}"), 400
+    except Exception as e:
+        return jsonify(str(e)), 400
+
+
+@app.route("/api/benchmark/jobs/<job_id>", methods=["GET"])
+def get_benchmark_job(job_id):
+    try:
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify(JOB_NOT_FOUND), 404
+        response = job_response(job)
+        response["message"] = "Benchmark job retrieved"
+        return jsonify(response), 200
+    except Exception as e:
+        return jsonify(str(e)), 400
+
+
+@app.route("/api/benchmark/jobs/<job_id>", methods=["DELETE"])
+def cancel_benchmark_job(job_id):
+    try:
+        job = jobs.cancel(job_id)
+        if job is None:
+            return jsonify(JOB_NOT_FOUND), 404
+        response = job_response(job)
+        if job.status != CANCELLED:
+            # The job had already finished; report how
+            response["message"] = f"Benchmark job already {job.status}"
+            return jsonify(response), 409
+        response["message"] = "Benchmark job cancelled"
+        return jsonify(response), 200
     except Exception as e:
         return jsonify(str(e)), 400
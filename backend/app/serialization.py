@@ -0,0 +1,163 @@
+import json
+from collections.abc import Iterator
+from flask import Response
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional; without it compact JSON is served
+    msgpack = None
+
+from app.services.point_service import Point
+
+# Wire formats of points:
+#   legacy: the JSON string of Point.to_json(), double-encoded.
+#   compact: a plain [x, y] pair, null for the point at infinity.
+#   msgpack: compact pairs packed with msgpack.
+LEGACY = "legacy"
+COMPACT = "compact"
+MSGPACK = "msgpack"
+FORMATS = [LEGACY, COMPACT, MSGPACK]
+MSGPACK_MIMETYPE = "application/msgpack"
+
+# Integers beyond these limits are sent as strings: JSON numbers are read as
+# doubles by most clients and msgpack integers have 64 bits.
+JSON_INT_LIMIT = 1 << 53
+MSGPACK_INT_LIMIT = 1 << 63
+# Streamed JSON is sent in pieces of about this many characters
+STREAM_CHUNK_SIZE = 1 << 16
+
+_dumps = json.JSONEncoder(separators=(",", ":")).encode
+
+
+def wire_format(request) -> str:
+    """Format asked for with the `format` argument or the Accept header."""
+    fmt = request.args.get("format")
+    if fmt is None:
+        best = request.accept_mimetypes.best_match(
+            ["application/json", MSGPACK_MIMETYPE]
+        )
+        fmt = MSGPACK if best == MSGPACK_MIMETYPE else LEGACY
+    if fmt not in FORMATS:
+        raise ValueError(f"Invalid format! Must be one of {', '.join(FORMATS)}.")
+    if fmt == MSGPACK and msgpack is None:
+        return COMPACT
+    return fmt
+
+
+def _integer(value: int, limit: int):
+    return str(value) if abs(value) >= limit else value
+
+
+def point_value(point: "Point", fmt: str = LEGACY):
+    if fmt == LEGACY:
+        return point.to_json()
+    if point.at_infinity():
+        return None
+    limit = MSGPACK_INT_LIMIT if fmt == MSGPACK else JSON_INT_LIMIT
+    return [_integer(point.x, limit), _integer(point.y, limit)]
+
+
+def parse_pair(value) -> tuple:
+    """Read the coordinates of a point in any wire format: a legacy JSON
+    string, an object with x and y, or an [x, y] pair whose coordinates may
+    be strings. The point at infinity (null) is (-1, -1)."""
+    if isinstance(value, str):
+        value = json.loads(value)
+    if isinstance(value, dict):
+        value = [value["x"], value["y"]]
+    if value is None:
+        return (-1, -1)
+    x, y = value
+    return (int(x), int(y))
+
+
+def parse_point(curve, value) -> "Point":
+    return Point(curve, *parse_pair(value))
+
+
+def _encode(value, fmt: str, stack: list, prefix: str = ""):
+    # `prefix`, a separator or a key, is written with the first piece of the
+    # value, so nothing dangles if the value fails before it starts. `stack`
+    # holds the closers of the arrays and objects still open.
+    if isinstance(value, Point):
+        yield prefix + _dumps(point_value(value, fmt))
+    elif callable(value):
+        # Filled in when reached, after any generator emitted before it
+        yield from _encode(value(), fmt, stack, prefix)
+    elif isinstance(value, dict):
+        yield prefix + "{"
+        stack.append("}")
+        for i, (key, item) in enumerate(value.items()):
+            key = ("," if i else "") + _dumps(str(key)) + ":"
+            yield from _encode(item, fmt, stack, key)
+        stack.pop()
+        yield "}"
+    elif isinstance(value, (list, tuple, Iterator)):
+        yield prefix + "["
+        stack.append("]")
+        for i, item in enumerate(value):
+            yield from _encode(item, fmt, stack, "," if i else "")
+        stack.pop()
+        yield "]"
+    else:
+        yield prefix + _dumps(value)
+
+
+def _error_tail(stack: list, last: str, message: str) -> str:
+    """JSON closing what _encode left open, with the error added to the
+    outermost object, or appended to the outermost array as an object."""
+    if not stack:
+        return _dumps({"error": message})
+    tail = "".join(reversed(stack[1:]))
+    if stack[0] == "}":
+        error, opener = _dumps("error") + ":" + _dumps(message), "{"
+    else:
+        error, opener = _dumps({"error": message}), "["
+    separator = "" if not tail and last.endswith(opener) else ","
+    return tail + separator + error + stack[0]
+
+
+def _plain(value, fmt: str):
+    if isinstance(value, Point):
+        return point_value(value, fmt)
+    if callable(value):
+        return _plain(value(), fmt)
+    if isinstance(value, dict):
+        return {str(key): _plain(item, fmt) for key, item in value.items()}
+    if isinstance(value, (list, tuple, Iterator)):
+        return [_plain(item, fmt) for item in value]
+    return value
+
+
+def stream_json(value, fmt: str = LEGACY):
+    """Yield the JSON text of `value` in pieces of about STREAM_CHUNK_SIZE.
+
+    Points are written in the given format as they are reached, generators
+    are consumed lazily and callables are called once their turn comes.
+
+    The status has been sent by the time a generator or a callable fails, so
+    the error is written into the body instead: the open arrays and objects
+    are closed and the outermost object gets an "error" member holding the
+    message, which keeps the JSON well formed.
+    """
+    buffer, size, stack, last = [], 0, [], ""
+    try:
+        for piece in _encode(value, fmt, stack):
+            buffer.append(piece)
+            size += len(piece)
+            last = piece
+            if size >= STREAM_CHUNK_SIZE:
+                yield "".join(buffer)
+                buffer, size = [], 0
+    except Exception as e:
+        buffer.append(_error_tail(stack, last, str(e)))
+    if buffer:
+        yield "".join(buffer)
+
+
+def respond(value, fmt: str = LEGACY, status: int = 200) -> "Response":
+    if fmt == MSGPACK:
+        return Response(
+            msgpack.packb(_plain(value, fmt)), status=status, mimetype=MSGPACK_MIMETYPE
+        )
+    return Response(stream_json(value, fmt), status=status, mimetype="application/json")
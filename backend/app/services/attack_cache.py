@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+from app.services.point_service import Point
+from app.services.curve_service import Curve
+
+# Discrete logarithms kept per process
+ATTACK_CACHE_SIZE = 1024
+
+
+def attack_key(name: str, ec: "Curve", G: "Point", A: "Point", *extra) -> tuple:
+    """Key of an attack on A = alpha * G over `ec`, plus the attack's own
+    parameters, since those can make it fail where another would not."""
+    return (name, ec.a, ec.b, ec.field, G.x, G.y, A.x, A.y, *extra)
+
+
+class AttackCache:
+    """LRU cache of the discrete logarithms found by deterministic attacks.
+
+    Solving the same (curve, G, A) again gives the same answer, so repeated
+    attacks are served from here unless they are run cold. Failures are not
+    kept, since attacks using random walks internally may succeed later.
+    """
+
+    def __init__(self, maxsize: int = ATTACK_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self.results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple) -> int:
+        with self._lock:
+            if key not in self.results:
+                return None
+            self.results.move_to_end(key)
+            return self.results[key]
+
+    def put(self, key: tuple, alpha: int) -> None:
+        with self._lock:
+            self.results[key] = alpha
+            self.results.move_to_end(key)
+            while len(self.results) > self.maxsize:
+                self.results.popitem(last=False)
+
+    def solve(self, key: tuple, solve, cold: bool = False) -> int:
+        """Return the cached result for `key`, or call `solve` and keep its
+        result. A cold solve always calls `solve`; a None key disables the
+        cache for this call."""
+        if key is not None and not cold:
+            alpha = self.get(key)
+            if alpha is not None:
+                return alpha
+        alpha = solve()
+        if key is not None and alpha is not None:
+            self.put(key, alpha)
+        return alpha
+
+    def clear(self) -> None:
+        with self._lock:
+            self.results.clear()
+
+
+attack_cache = AttackCache()
@@ -1,88 +1,130 @@
-import time
-from app.services.point_service import Point
+import numpy as np
+from app.services.point_service import Point, progression
+from app.services.point_batch import PointBatch, batched
 from app.services.curve_service import Curve
+from app.services.benchmarking import WARMUP_TRIES, measure
+from app.services.attack_cache import attack_cache, attack_key
 
 DELIMITER = "------------------------------------------------------------------"
 
+# Rough per-entry cost of the baby-step table: a dict slot plus a Point
+# holding two integers. Used to translate a memory budget into a table size.
+TABLE_ENTRY_SIZE = 256
+DEFAULT_MEMORY_BUDGET = 64 * 1024 * 1024
+
 class BabyStepGiantStep:
-    def __init__(self, ec: "Curve", m: int, G: "Point", A: "Point"):
+    def __init__(
+        self,
+        ec: "Curve",
+        m: int,
+        G: "Point",
+        A: "Point",
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        order: int = None,
+        cache: bool = True,
+    ):
         self.ec = ec
-        self.m = m
         self.G = G
         self.A = A
+        # Without a known order the search space is m * m, as if m baby steps
+        # and m giant steps were taken.
+        if order:
+            self.order = order
+        else:
+            self.order = ec.n if ec.n > 0 else m * m
+        self.m = max(1, min(m, memory_budget // TABLE_ENTRY_SIZE))
+        self.cache = cache
 
-    def __baby_step(self) -> list:
-        baby_steps = [None] * self.m
-        for i in range(self.m):
-            result = self.G * i
-            if result.at_infinity():
-                result = Point(self.ec, 0, 0)
-            baby_steps[i] = result
+    def __baby_step(self) -> dict:
+        baby_steps = {}
+        for i, result in enumerate(progression(Point(self.ec, -1, -1), self.G, self.m)):
+            baby_steps.setdefault(result, i)
         return baby_steps
 
-    def __giant_step(self) -> list:
-        giant_steps = [None] * self.m
-        for i in range(self.m):
-            result = self.G * (self.m * i)
-            if result.at_infinity():
-                result = Point(self.ec, 0, 0)
-            giant_steps[i] = self.A - result
-        return giant_steps
-
-    def attack(self) -> int:
-        found = False
-        baby_steps = self.__baby_step()
-        giant_steps = self.__giant_step()
-        i = 0
-        j = 0
-        for j in range(self.m):
-            for i in range(self.m):
-                if baby_steps[i] == giant_steps[j]:
-                    found = True
-                    break
-            if found:
-                break
+    def __giant_step(self):
+        giant_stride = -(self.G * self.m)
+        return progression(self.A, giant_stride, -(-self.order // self.m))
 
-        if not found:
-            return None
+    def attack(self, cold: bool = False) -> int:
+        """Solve A = alpha * G, reusing a cached result unless `cold`."""
+        key = None
+        if self.cache:
+            key = attack_key(
+                "Baby-Step Giant-Step", self.ec, self.G, self.A, self.m, self.order
+            )
+        return attack_cache.solve(key, self.__attack, cold)
+
+    def __attack(self) -> int:
+        infinity = Point(self.ec, -1, -1)
+        if batched(infinity, self.G, self.m):
+            return self.__attack_batched(infinity)
+        baby_steps = self.__baby_step()
+        for j, giant_step in enumerate(self.__giant_step()):
+            i = baby_steps.get(giant_step)
+            if i is not None:
+                return (i + j * self.m) % self.order
+        return None
 
-        alpha = i + j * self.m
-        alpha = (alpha + self.ec.field) % self.ec.field
-        return alpha
+    def __attack_batched(self, infinity: "Point") -> int:
+        # Baby steps are kept as sorted keys x * p + y, and every block of
+        # giant steps is looked up in them with a single binary search.
+        field = self.ec.field
+        blocks = list(PointBatch.progression_blocks(infinity, self.G, self.m))
+        keys = np.concatenate([block.xs * field + block.ys for block in blocks])
+        # The first index of every point, as with setdefault in __baby_step
+        keys, first = np.unique(keys, return_index=True)
+        giant_stride = -(self.G * self.m)
+        j = 0
+        for block in PointBatch.progression_blocks(self.A, giant_stride, -(-self.order // self.m)):
+            giant_steps = block.xs * field + block.ys
+            found = np.minimum(np.searchsorted(keys, giant_steps), len(keys) - 1)
+            matches = np.flatnonzero(keys[found] == giant_steps)
+            if len(matches):
+                k = int(matches[0])
+                return (int(first[found[k]]) + (j + k) * self.m) % self.order
+            j += len(block)
+        return None
 
     @staticmethod
-    def benchmark(curves: list, num_tries: int) -> None:
+    def benchmark(
+        curves: list,
+        num_tries: int,
+        memory_budget: int = DEFAULT_MEMORY_BUDGET,
+        warmup: int = WARMUP_TRIES,
+        cache: bool = True,
+        stop=None,
+    ) -> list:
 
         results = []
         for data in curves:
-            curve = data[0]
-            ec = Curve(int(curve.a), int(curve.b), int(curve.field))
-            ec.base = Point(ec, int(curve.base.x), int(curve.base.y))
-            A = Point(ec, int(data[1].x), int(data[1].y))
-            m = int(data[2])
-            attacker = BabyStepGiantStep(ec, m, ec.base, A)
-            success_count = 0
-            start = time.time()
-            for _ in range(num_tries):
-                alpha = attacker.attack()
-                if alpha is not None and ec.base * alpha == A:
-                    success_count += 1
-            end = time.time()
-            elapsed_time = end - start
-            results.append((success_count, success_count / num_tries, elapsed_time))
+
+            def prepare():
+                curve = data[0]
+                ec = Curve(int(curve.a), int(curve.b), int(curve.field))
+                ec.base = Point(ec, int(curve.base.x), int(curve.base.y))
+                ec.n = int(curve.n)
+                A = Point(ec, int(data[1].x), int(data[1].y))
+                m = int(data[2])
+                attacker = BabyStepGiantStep(ec, m, ec.base, A, memory_budget)
+
+                def attempt(cold: bool = False) -> bool:
+                    alpha = attacker.attack(cold)
+                    return alpha is not None and ec.base * alpha == A
+
+                return attempt
+
+            results.append(measure(prepare, num_tries, warmup, cached=cache, stop=stop))
         return results
 
 def test_baby_step_giant_step():
-    ec = Curve(2, 2)
-    ec.field = 17
+    ec = Curve(2, 2, 17)
     ec.base = Point(
-        ec.a,
-        ec.field,
+        ec,
         5,
         1,
     )
 
-    A = Point(ec.a, ec.field, 10, 6)
+    A = Point(ec, 10, 6)
     m = 5
     attacker = BabyStepGiantStep(ec, m, ec.base, A)
     alpha = attacker.attack()
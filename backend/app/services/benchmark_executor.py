@@ -0,0 +1,159 @@
+import os
+import math
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from app.services.point_service import Point
+from app.services.curve_service import Curve
+from app.services.setup import Setup
+from app.services.pohlig_hellman import PohligHellman
+from app.services.baby_step_giant_step import BabyStepGiantStep
+from app.services.pollard_rho import PollardRho, PollardKangaroo
+from app.services.benchmarking import BenchmarkResult
+from app.services.curve_catalogue import CATALOGUE_PATH, catalogue
+
+ATTACKS = {
+    "SETUP": Setup,
+    "Pohlig-Hellman": PohligHellman,
+    "Baby-Step Giant-Step": BabyStepGiantStep,
+    "Pollard's Rho": PollardRho,
+    "Pollard's Kangaroo": PollardKangaroo,
+}
+# Attacks drawing random numbers, whose benchmark() accepts a seed
+SEEDED_ATTACKS = ["SETUP", "Pollard's Rho"]
+# Deterministic attacks whose results are cached; their benchmark() accepts
+# cache=False to time every try cold. SETUP draws new keys on every try and
+# rho's cost is its random walk, so neither is cached.
+CACHED_ATTACKS = ["Pohlig-Hellman", "Baby-Step Giant-Step", "Pollard's Kangaroo"]
+
+
+def catalogue_spec(algorithm: str, spec: dict, rng, path: str = CATALOGUE_PATH) -> dict:
+    """Fill in a spec referencing a catalogue curve by its curveId.
+
+    The curve's parameters, order factorization and a random point_a, with
+    the m, lower and upper that suit it, come from the catalogue; values
+    given in the spec take precedence. Specs without curveId are unchanged.
+    """
+    if "curveId" not in spec:
+        return spec
+    entries = catalogue(path)
+    if spec["curveId"] not in entries:
+        raise ValueError(f"Unknown curve! {spec['curveId']} is not in the catalogue.")
+    params = entries[spec["curveId"]].benchmark_params(algorithm, rng)
+    if "point_a" in spec and "lower" in params:
+        # The interval was drawn around the catalogue's own point_a
+        params["lower"], params["upper"] = 0, params["n"] - 1
+    params.update((key, value) for key, value in spec.items() if key != "curveId")
+    return params
+
+
+def attack_work(algorithm: str, spec: dict) -> int:
+    """Rough number of group operations of one try of `algorithm` on a spec.
+
+    Baby-Step Giant-Step takes m steps, the kangaroo the square root of its
+    interval, rho the square root of n and Pohlig-Hellman that of the
+    largest prime factor of n, or of n itself when no factors are given.
+    """
+    if algorithm == "SETUP":
+        return 0
+    if algorithm == "Baby-Step Giant-Step":
+        return spec["m"]
+    if algorithm == "Pollard's Kangaroo":
+        return math.isqrt(spec["upper"] - spec["lower"])
+    if algorithm == "Pohlig-Hellman" and spec.get("factors"):
+        return math.isqrt(max(spec["factors"]))
+    return math.isqrt(spec["n"])
+
+
+def build_entry(algorithm: str, spec: dict):
+    """Rebuild the input of `benchmark()` from a picklable curve specification.
+
+    A spec holds plain integers: a, b, field, n, base as an (x, y) tuple and,
+    depending on the attack, point_a, m, lower and upper. Specs of catalogue
+    curves also carry the factorization of n as a {prime: exponent} dict.
+    """
+    curve = Curve(spec["a"], spec["b"], spec["field"])
+    curve.base = Point(curve, *spec["base"])
+    curve.n = spec["n"]
+    if algorithm == "SETUP":
+        return curve
+    point_a = Point(curve, *spec["point_a"])
+    if algorithm == "Baby-Step Giant-Step":
+        return (curve, point_a, spec["m"])
+    if algorithm == "Pollard's Kangaroo":
+        return (curve, point_a, spec["lower"], spec["upper"])
+    if algorithm == "Pohlig-Hellman" and spec.get("factors"):
+        return (curve, point_a, spec["factors"])
+    return (curve, point_a)
+
+
+def run_unit(
+    algorithm: str, spec: dict, num_tries: int, options: dict
+) -> "BenchmarkResult":
+    """Benchmark `num_tries` tries of one curve; runs inside a worker process."""
+    entry = build_entry(algorithm, spec)
+    return ATTACKS[algorithm].benchmark([entry], num_tries, **options)[0]
+
+
+def merge_results(results: list) -> "BenchmarkResult":
+    return BenchmarkResult.merge(results)
+
+
+class BenchmarkExecutor:
+    """Spreads (curve, tries) work units of a benchmark over worker processes.
+
+    Each curve's tries are split into at most max_workers chunks so a few
+    curves still keep every worker busy. The chunks of a curve are merged
+    into one BenchmarkResult holding the timings of all its tries; a seed
+    is offset by the chunk index so chunks do not repeat the same tries.
+    """
+
+    def __init__(self, max_workers: int = None) -> None:
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+
+    @property
+    def pool(self) -> "ProcessPoolExecutor":
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._pool
+
+    def chunks(self, num_curves: int, num_tries: int) -> list:
+        count = max(1, min(num_tries, -(-self.max_workers // max(num_curves, 1))))
+        size, extra = divmod(num_tries, count)
+        return [size + 1 if i < extra else size for i in range(count)]
+
+    def submit_chunk(
+        self, algorithm: str, spec: dict, index: int, tries: int, options: dict
+    ) -> "Future":
+        """Queue chunk `index` of one curve, holding `tries` tries."""
+        if algorithm not in ATTACKS:
+            raise ValueError("Invalid algorithm")
+        chunk_options = dict(options)
+        if options.get("seed") is not None:
+            chunk_options["seed"] = options["seed"] + index
+        return self.pool.submit(run_unit, algorithm, spec, tries, chunk_options)
+
+    def submit(self, algorithm: str, spec: dict, chunks: list, options: dict) -> list:
+        """Queue one curve split into `chunks` tries and return the futures."""
+        return [
+            self.submit_chunk(algorithm, spec, i, tries, options)
+            for i, tries in enumerate(chunks)
+        ]
+
+    def run(self, algorithm: str, specs: list, num_tries: int, **options) -> list:
+        if algorithm not in ATTACKS:
+            raise ValueError("Invalid algorithm")
+        if self.max_workers == 1:
+            return [run_unit(algorithm, spec, num_tries, options) for spec in specs]
+
+        chunks = self.chunks(len(specs), num_tries)
+        futures = [self.submit(algorithm, spec, chunks, options) for spec in specs]
+        return [
+            merge_results([future.result() for future in curve_futures])
+            for curve_futures in futures
+        ]
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
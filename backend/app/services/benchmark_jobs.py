@@ -0,0 +1,152 @@
+import time
+import uuid
+import threading
+import multiprocessing
+
+from app.services.benchmark_executor import BenchmarkExecutor, merge_results
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+class BenchmarkJob:
+    """A benchmark running in the background, one result per curve.
+
+    Attributes:
+        id: Identifier of the job.
+        algorithm: Attack being benchmarked.
+        specs: Picklable specifications of the curves.
+        num_tries: Tries per curve.
+        results: Per-curve BenchmarkResult, None until done.
+        status: pending, running, completed, cancelled or failed.
+        error: Error message of a failed job.
+        stop: Event shared with the worker processes, set when the job is
+            cancelled or fails so running chunks skip their remaining tries.
+    """
+
+    def __init__(self, algorithm: str, specs: list, num_tries: int, stop=None) -> None:
+        self.id = str(uuid.uuid4())
+        self.algorithm = algorithm
+        self.specs = specs
+        self.num_tries = num_tries
+        self.results = [None] * len(specs)
+        self.status = PENDING
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+        self.futures = []
+        self.stop = stop
+        self._chunks = [[] for _ in specs]
+        self._lock = threading.RLock()
+
+    @property
+    def done(self) -> bool:
+        return self.status in [COMPLETED, CANCELLED, FAILED]
+
+    @property
+    def progress(self) -> float:
+        if not self.specs:
+            return 1.0
+        return sum(result is not None for result in self.results) / len(self.specs)
+
+    def finish(self, status: str, error: str = None) -> None:
+        if self.done:
+            return
+        self.status, self.error, self.finished = status, error, time.time()
+        if status != COMPLETED and self.stop is not None:
+            self.stop.set()
+        for future in self.futures:
+            future.cancel()
+
+    def chunk_done(self, i: int, total: int, future) -> None:
+        with self._lock:
+            if self.done or future.cancelled():
+                return
+            if future.exception() is not None:
+                self.finish(FAILED, str(future.exception()))
+                return
+            self.status = RUNNING
+            self._chunks[i].append(future.result())
+            if len(self._chunks[i]) == total:
+                self.results[i] = merge_results(self._chunks[i])
+            if all(result is not None for result in self.results):
+                self.finish(COMPLETED)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self.finish(CANCELLED)
+
+
+class BenchmarkJobManager:
+    """Runs benchmark jobs on a BenchmarkExecutor without blocking the caller.
+
+    Every chunk of every curve is queued on the executor's process pool up
+    front; completion callbacks fill in the job's results, so no thread is
+    held per job. The executor should be one of its own, so queued jobs do
+    not delay synchronous benchmarks. Workers check the job's stop event
+    between tries, so cancelling also ends the chunks already running.
+    Finished jobs are kept for `retention` seconds.
+    """
+
+    def __init__(self, executor: "BenchmarkExecutor", retention: int = 3600) -> None:
+        self.executor = executor
+        self.retention = retention
+        self.jobs = {}
+        self._lock = threading.Lock()
+        self._sync = None
+
+    @property
+    def sync(self) -> "multiprocessing.managers.SyncManager":
+        # Serves the stop events shared with the worker processes
+        with self._lock:
+            if self._sync is None:
+                self._sync = multiprocessing.Manager()
+            return self._sync
+
+    def __evict(self) -> None:
+        now = time.time()
+        for job_id, job in list(self.jobs.items()):
+            if job.done and now - job.finished > self.retention:
+                del self.jobs[job_id]
+
+    def submit(
+        self, algorithm: str, specs: list, num_tries: int, **options
+    ) -> "BenchmarkJob":
+        job = BenchmarkJob(algorithm, specs, num_tries, self.sync.Event())
+        with self._lock:
+            self.__evict()
+            self.jobs[job.id] = job
+        if not specs:
+            job.finish(COMPLETED)
+            return job
+        chunks = self.executor.chunks(len(specs), num_tries)
+        options = dict(options, stop=job.stop.is_set)
+        for i, spec in enumerate(specs):
+            for k, tries in enumerate(chunks):
+                # Checked under the lock for every chunk, so a job cancelled
+                # meanwhile queues nothing more and every queued future is
+                # in job.futures when finish() cancels them.
+                with job._lock:
+                    if job.done:
+                        return job
+                    future = self.executor.submit_chunk(algorithm, spec, k, tries, options)
+                    job.futures.append(future)
+                    future.add_done_callback(
+                        lambda future, i=i: job.chunk_done(i, len(chunks), future)
+                    )
+        return job
+
+    def get(self, job_id: str) -> "BenchmarkJob":
+        with self._lock:
+            self.__evict()
+            return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> "BenchmarkJob":
+        """Cancel a job; one already finished keeps its status."""
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
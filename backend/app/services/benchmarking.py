@@ -0,0 +1,177 @@
+import csv
+import json
+import math
+import time
+
+# Untimed tries run before the measured ones, so caches and lazily built
+# tables are warm when timing starts.
+WARMUP_TRIES = 1
+PERCENTILES = [50, 95, 99]
+
+
+def percentile(values: list, q: float) -> float:
+    """q-th percentile of sorted values, interpolating between ranks."""
+    if not values:
+        return 0.0
+    rank = (len(values) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return values[low] + (values[high] - values[low]) * (rank - low)
+
+
+class BenchmarkResult:
+    """Outcome of the measured tries of one benchmarked curve.
+
+    Attributes:
+        successes: Number of successful tries.
+        timings: Duration of every measured try in nanoseconds.
+        setup: Time spent preparing the attack in nanoseconds. Every chunk
+            of a merged result prepares the same attack, so it holds the
+            longest preparation of a chunk rather than their sum.
+        warmup: Number of untimed tries run before the measured ones, per
+            chunk in a merged result.
+        cold: Durations in nanoseconds of the solves made without the attack
+            cache before the cached tries, one per chunk; empty if none was
+            made.
+    """
+
+    def __init__(
+        self,
+        successes: int,
+        timings: list,
+        setup: int = 0,
+        warmup: int = 0,
+        cold: list = None,
+    ):
+        self.successes = successes
+        self.timings = timings
+        self.setup = setup
+        self.warmup = warmup
+        self.cold = cold or []
+
+    @property
+    def tries(self) -> int:
+        return len(self.timings)
+
+    @property
+    def rate(self) -> float:
+        return self.successes / self.tries if self.tries else 0.0
+
+    @property
+    def elapsed(self) -> float:
+        """Total time of the measured tries in seconds."""
+        return sum(self.timings) / 1e9
+
+    @property
+    def ops_per_sec(self) -> float:
+        return self.tries / self.elapsed if self.elapsed else 0.0
+
+    def stats(self) -> dict:
+        """Summary of the timings, in milliseconds."""
+        timings = sorted(self.timings)
+        mean = sum(timings) / len(timings) if timings else 0.0
+        variance = (
+            sum((t - mean) ** 2 for t in timings) / (len(timings) - 1)
+            if len(timings) > 1
+            else 0.0
+        )
+        stats = {
+            "setup": self.setup / 1e6,
+            "cold": sum(self.cold) / len(self.cold) / 1e6 if self.cold else None,
+            "mean": mean / 1e6,
+            "stdev": math.sqrt(variance) / 1e6,
+            "min": timings[0] / 1e6 if timings else 0.0,
+            "max": timings[-1] / 1e6 if timings else 0.0,
+        }
+        for q in PERCENTILES:
+            stats[f"p{q}"] = percentile(timings, q) / 1e6
+        stats["opsPerSec"] = self.ops_per_sec
+        return stats
+
+    def to_dict(self) -> dict:
+        return {
+            "tries": self.tries,
+            "successes": self.successes,
+            "rate": self.rate,
+            "time": self.elapsed,
+            "warmup": self.warmup,
+            **self.stats(),
+        }
+
+    @staticmethod
+    def merge(results: list) -> "BenchmarkResult":
+        """Combine the results of tries of the same curve run in chunks."""
+        return BenchmarkResult(
+            sum(result.successes for result in results),
+            [timing for result in results for timing in result.timings],
+            max((result.setup for result in results), default=0),
+            max((result.warmup for result in results), default=0),
+            [cold for result in results for cold in result.cold],
+        )
+
+
+def measure(
+    prepare,
+    num_tries: int,
+    warmup: int = WARMUP_TRIES,
+    cached: bool = None,
+    stop=None,
+) -> "BenchmarkResult":
+    """Benchmark an attack with per-try timings.
+
+    `prepare` builds the attack and returns a callable running one try and
+    returning whether it succeeded. Preparation is timed on its own and the
+    warm-up tries are not timed at all.
+
+    Attacks whose results are cached take `cached` and their callable
+    receives a `cold` flag. When `cached` is True the attack is solved from
+    scratch once, timed on its own as `cold`, and the warm-up and measured
+    tries are answered by the cache, so identical work is not repeated. When
+    False every try solves from scratch, for honest per-try timings.
+
+    `stop`, when given, is called before every try; once it returns True
+    the remaining tries are skipped and the result holds those made so far.
+    """
+    start = time.perf_counter_ns()
+    attempt = prepare()
+    setup = time.perf_counter_ns() - start
+
+    stopped = stop if stop is not None else lambda: False
+
+    cold = []
+    if cached:
+        if not stopped():
+            start = time.perf_counter_ns()
+            attempt(True)
+            cold.append(time.perf_counter_ns() - start)
+        run = attempt
+    elif cached is False:
+        run = lambda: attempt(True)
+    else:
+        run = attempt
+
+    for _ in range(warmup):
+        if stopped():
+            break
+        run()
+    successes, timings = 0, []
+    for _ in range(num_tries):
+        if stopped():
+            break
+        start = time.perf_counter_ns()
+        success = run()
+        timings.append(time.perf_counter_ns() - start)
+        if success:
+            successes += 1
+    return BenchmarkResult(successes, timings, setup, warmup, cold)
+
+
+def export_json(rows: list, file) -> None:
+    json.dump(rows, file, indent=4)
+
+
+def export_csv(rows: list, file) -> None:
+    if not rows:
+        return
+    writer = csv.DictWriter(file, fieldnames=list(rows[0]))
+    writer.writeheader()
+    writer.writerows(rows)
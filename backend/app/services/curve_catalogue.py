@@ -0,0 +1,218 @@
+import os
+import json
+import math
+from functools import lru_cache
+from sympy import factorint, isprime, nextprime
+
+from app.services.point_service import Point, CurveParams
+from app.services.point_counting import MESTRE_LIMIT, count_points
+from app.utils import sqrt_mod
+
+CATALOGUE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "catalogue",
+    "curves.json",
+)
+# Random points tried when looking for a generator of the whole group
+GENERATOR_ATTEMPTS = 32
+# Width of the interval given to Pollard's kangaroo around the secret
+KANGAROO_INTERVAL = 1 << 20
+
+
+def _factors_value(factors: dict) -> list:
+    return [[q, e] for q, e in sorted(factors.items())]
+
+
+class CatalogueCurve:
+    """Curve of the catalogue with its derived data computed beforehand.
+
+    Attributes:
+        id: Identifier of the curve in the catalogue.
+        name: Description of the curve.
+        a: Coefficient of the curve.
+        b: Coefficient of the curve.
+        field: Field of the curve.
+        base: Generator, as an (x, y) tuple.
+        n: Order of the generator.
+        cofactor: Number of points of the curve divided by n.
+        factors: Factorization of n as a {prime: exponent} dictionary.
+
+    Methods:
+        order: Return the number of points of the curve, infinity included.
+        benchmark_params: Return benchmark parameters on this curve.
+        to_dict: Return the entry as stored in the catalogue.
+    """
+
+    def __init__(
+        self,
+        curve_id: str,
+        name: str,
+        a: int,
+        b: int,
+        field: int,
+        base: tuple,
+        n: int,
+        cofactor: int,
+        factors: dict,
+    ) -> None:
+        self.id, self.name = curve_id, name
+        self.a, self.b, self.field = a, b, field
+        self.base = tuple(base)
+        self.n, self.cofactor = n, cofactor
+        self.factors = factors
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "CatalogueCurve":
+        return cls(
+            data["id"],
+            data["name"],
+            data["a"],
+            data["b"],
+            data["field"],
+            data["base"],
+            data["n"],
+            data["cofactor"],
+            {q: e for q, e in data["factors"]},
+        )
+
+    def order(self) -> int:
+        return self.n * self.cofactor
+
+    def benchmark_params(self, algorithm: str, rng) -> dict:
+        """Parameters of a benchmark of `algorithm` on this curve, in the shape
+        of a benchmark specification. point_a is alpha * base for an alpha
+        drawn from `rng`, m covers the order and the kangaroo interval
+        holds alpha."""
+        params = {
+            "a": self.a,
+            "b": self.b,
+            "field": self.field,
+            "n": self.n,
+            "base": self.base,
+            "factors": dict(self.factors),
+        }
+        if algorithm == "SETUP":
+            return params
+        alpha = rng.randrange(1, self.n)
+        point_a = Point(CurveParams(self.a, self.field), *self.base) * alpha
+        params["point_a"] = (point_a.x, point_a.y)
+        if algorithm == "Baby-Step Giant-Step":
+            params["m"] = math.isqrt(self.n) + 1
+        elif algorithm == "Pollard's Kangaroo":
+            width = min(KANGAROO_INTERVAL, self.n - 1)
+            params["lower"] = max(0, min(alpha - rng.randrange(width + 1), self.n - 1 - width))
+            params["upper"] = params["lower"] + width
+        return params
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "a": self.a,
+            "b": self.b,
+            "field": self.field,
+            "base": list(self.base),
+            "n": self.n,
+            "cofactor": self.cofactor,
+            "factors": _factors_value(self.factors),
+        }
+
+
+def _random_point(a: int, b: int, field: int, rng) -> tuple:
+    while True:
+        x = rng.randrange(field)
+        y = sqrt_mod(x**3 + a * x + b, field)
+        if y is not None:
+            return (x, y)
+
+
+def _order_factors(point: "Point", factors: dict) -> dict:
+    """Factorization of the order of `point`, from that of a multiple of it."""
+    order, factors = math.prod(q**e for q, e in factors.items()), dict(factors)
+    for q in factors:
+        while factors[q] and (point * (order // q)).at_infinity():
+            order //= q
+            factors[q] -= 1
+    return {q: e for q, e in factors.items() if e}
+
+
+def describe_curve(
+    curve_id: str, name: str, a: int, b: int, field: int, base: tuple = None, rng=None
+) -> "CatalogueCurve":
+    """Count and factor the points of a curve and describe it as an entry.
+
+    Without a base point, random points are tried and the one of largest
+    order is kept, which generates the whole group whenever it is cyclic.
+    """
+    params = CurveParams(a, field)
+    order = count_points(a, b, field)
+    factors = {int(q): int(e) for q, e in factorint(order).items()}
+    if base is not None:
+        candidates = [base]
+    else:
+        candidates = (_random_point(a, b, field, rng) for _ in range(GENERATOR_ATTEMPTS))
+    best, best_factors, n = None, None, 0
+    for candidate in candidates:
+        candidate_factors = _order_factors(Point(params, *candidate), factors)
+        candidate_n = math.prod(q**e for q, e in candidate_factors.items())
+        if candidate_n > n:
+            best, best_factors, n = candidate, candidate_factors, candidate_n
+        if n == order:
+            break
+    return CatalogueCurve(curve_id, name, a, b, field, best, n, order // n, best_factors)
+
+
+def smooth_curve(curve_id: str, bits: int, bound: int, rng) -> "CatalogueCurve":
+    """Random curve over a prime field of `bits` bits whose order has no prime
+    factor above `bound`, so Pohlig-Hellman breaks it quickly."""
+    while True:
+        field = nextprime(rng.randrange(1 << (bits - 1), 1 << bits))
+        if field >= 1 << bits:
+            continue
+        a, b = rng.randrange(field), rng.randrange(1, field)
+        if (4 * a**3 + 27 * b**2) % field == 0:
+            continue
+        if max(factorint(count_points(a, b, field))) > bound:
+            continue
+        name = f"Random {bits}-bit curve with a {bound}-smooth order"
+        return describe_curve(curve_id, name, a, b, field, rng=rng)
+
+
+def check_entry(entry: "CatalogueCurve") -> list:
+    """Return the inconsistencies of an entry; empty when it is correct."""
+    errors = []
+    a, b, p = entry.a, entry.b, entry.field
+    x, y = entry.base
+    if (y * y - x**3 - a * x - b) % p:
+        errors.append("the base point is not on the curve")
+    if math.prod(q**e for q, e in entry.factors.items()) != entry.n:
+        errors.append("the factors do not multiply to n")
+    if not all(isprime(q) for q in entry.factors):
+        errors.append("a factor is not prime")
+    base = Point(CurveParams(a, p), x, y)
+    if not (base * entry.n).at_infinity():
+        errors.append("n * base is not the point at infinity")
+    elif _order_factors(base, entry.factors) != entry.factors:
+        errors.append("n is not the order of the base point")
+    if p < MESTRE_LIMIT and count_points(a, b, p) != entry.order():
+        errors.append("n * cofactor is not the number of points")
+    return errors
+
+
+def load_catalogue(path: str = CATALOGUE_PATH) -> dict:
+    """Read the entries of a catalogue file, by id."""
+    with open(path) as file:
+        entries = [CatalogueCurve.from_dict(data) for data in json.load(file)["curves"]]
+    return {entry.id: entry for entry in entries}
+
+
+def save_catalogue(entries: list, path: str = CATALOGUE_PATH) -> None:
+    with open(path, "w") as file:
+        json.dump({"curves": [entry.to_dict() for entry in entries]}, file, indent=4)
+        file.write("\n")
+
+
+@lru_cache(maxsize=4)
+def catalogue(path: str = CATALOGUE_PATH) -> dict:
+    """Catalogue entries by id, read once per process."""
+    return load_catalogue(path)
@@ -1,6 +1,86 @@
+import threading
 from typing import Any
+from functools import lru_cache
+from collections import OrderedDict
+import numpy as np
 from sympy import isprime
-from app.services.point_service import Point
+from app.services.point_service import Point, FixedBasePoint, CurveParams, progression
+from app.services.point_batch import BATCH_MIN_POINTS, PointBatch, pow_mod, supported
+from app.services.point_counting import count_points
+from app.utils import sqrt_mod
+
+# Largest field whose points are indexed by x for Curve.y_for; bigger fields
+# take a square root per lookup instead of listing every point.
+POINTS_LIMIT = 1 << 16
+# Points are enumerated in blocks of x values. Blocks are vectorised with
+# NumPy on the fields supported by PointBatch, and square roots are read
+# from a shared table for fields up to SQRT_TABLE_LIMIT.
+BLOCK_SIZE = 4096
+SQRT_TABLE_LIMIT = 1 << 20
+# Rough memory cost of a curve and of each point it keeps, plus one byte per
+# byte of coordinates; used to keep session stores under a memory ceiling.
+CURVE_SIZE = 2048
+POINT_SIZE = 128
+# Curves whose derived data is shared between sessions, and base point
+# tables kept per curve.
+ARTIFACTS_CACHE_SIZE = 16
+BASE_TABLES_LIMIT = 8
+
+
+@lru_cache(maxsize=8)
+def _sqrt_table(p: int) -> np.ndarray:
+    # For a prime p the squares of 0..(p - 1) / 2 are pairwise distinct, so
+    # each residue receives its smallest root and non-residues keep -1.
+    roots = np.full(p, -1, dtype=np.int64)
+    ys = np.arange(p // 2 + 1, dtype=np.int64)
+    roots[(ys * ys) % p] = ys
+    return roots
+
+
+def _block_roots(a: int, b: int, p: int, start: int, stop: int) -> tuple:
+    """x values in [start, stop) on the curve and the smallest root of each."""
+    xs = np.arange(start, stop, dtype=np.int64)
+    rhs = ((xs * xs % p) * xs % p + (a % p) * xs % p + b % p) % p
+    if p <= SQRT_TABLE_LIMIT:
+        roots = _sqrt_table(p)[rhs]
+        found = roots >= 0
+        return xs[found].tolist(), roots[found].tolist()
+    residues = (rhs == 0) | (pow_mod(rhs, (p - 1) // 2, p) == 1)
+    return xs[residues].tolist(), [sqrt_mod(r, p) for r in rhs[residues].tolist()]
+
+
+class CurveArtifacts:
+    """Data derived from the parameters a, b and field of a curve alone.
+
+    One instance is shared by every Curve with the same parameters, so the
+    point list, order, x-index and base point tables are computed and held
+    once. Members are built lazily by Curve and never modified afterwards.
+    """
+
+    def __init__(self, a: int, b: int, field: int) -> None:
+        self.params = CurveParams(a, field)
+        self.order = None
+        self.points = None
+        self.x_index = None
+        self.bases = OrderedDict()
+        self._lock = threading.Lock()
+
+    def base(self, point: "Point") -> "FixedBasePoint":
+        """Return the shared FixedBasePoint equal to `point`."""
+        with self._lock:
+            key = (point.x, point.y)
+            if key in self.bases:
+                self.bases.move_to_end(key)
+            else:
+                self.bases[key] = FixedBasePoint(self.params, point.x, point.y)
+                if len(self.bases) > BASE_TABLES_LIMIT:
+                    self.bases.popitem(last=False)
+            return self.bases[key]
+
+
+@lru_cache(maxsize=ARTIFACTS_CACHE_SIZE)
+def curve_artifacts(a: int, b: int, field: int) -> "CurveArtifacts":
+    return CurveArtifacts(a, b, field)
 
 
 class Curve:
@@ -11,26 +91,32 @@ class Curve:
         b: Coefficient of the curve.
         field: Field of the curve.
         n: Order of the curve.
-        points: List of points on the curve.
+        params: Parameters shared by the points of the curve.
+        artifacts: Derived data shared by the curves with the same parameters.
+        points: Points on the curve, shared with the curves of same parameters.
         base: Base point on the curve.
         public_keys: Dictionary of public keys.
         simulation: Flag to indicate if the curve is in simulation mode.
 
     Methods:
         __setattr__: Set the value of an attribute.
-        order: Return the order of the curve.
+        order: Return the number of points of the curve, infinity included.
+        footprint: Return the estimated memory used by the curve in bytes.
         m: Return the size of the alphabet.
-        calculate_points: Calculate the points on the curve.ç
+        calculate_points: Calculate the points on the curve.
+        iter_points: Yield the points on the curve lazily.
         steps: Return the steps to calculate a scalar multiplication.
+        y_for: Return a y-coordinate for a given x-coordinate.
         encode: Encode a message using the alphabet.
         decode: Decode a list of points using the alphabet.
         encrypt: Encrypt a message using a public key.
+        encrypt_bulk: Encrypt many messages for many recipients.
         decrypt: Decrypt a list of points using a private key.
     """
 
     def __init__(self, a: int, b: int, field: int, simulation: bool = False) -> None:
         self.n = 0
-        self.points = []
+        self._artifacts = None
         self.public_keys = {}
 
         self.simulation = simulation
@@ -49,44 +135,120 @@ class Curve:
             and self.simulation
         ):
             raise ValueError("Not a prime number!")
+        if __name == "base" and type(__value) == Point:
+            # Multiples of the base point are served from a window table
+            # shared by every session using the same curve and base point.
+            __value = self.artifacts.base(__value)
         super().__setattr__(__name, __value)
-        if (
-            __name in ["a", "b", "field"]
-            and hasattr(self, "a")
-            and hasattr(self, "b")
-            and hasattr(self, "field")
-            and getattr(self, "simulation", False)
-        ):
-            try:
-                self.calculate_points()
-            except ValueError:
-                pass
+        if __name in ["a", "b", "field"]:
+            super().__setattr__("_artifacts", None)
+
+    @property
+    def artifacts(self) -> "CurveArtifacts":
+        if self._artifacts is None:
+            self._artifacts = curve_artifacts(self.a, self.b, self.field)
+        return self._artifacts
+
+    @property
+    def params(self) -> "CurveParams":
+        """Parameters shared by all the points created from this curve."""
+        return self.artifacts.params
+
+    @property
+    def points(self) -> tuple:
+        if self.artifacts.points is None:
+            self.calculate_points()
+        return self.artifacts.points
 
     def order(self) -> int:
-        return len(self.points) + 1
+        if self.artifacts.order is None:
+            self.artifacts.order = count_points(self.a, self.b, self.field)
+        return self.artifacts.order
+
+    def footprint(self) -> int:
+        # Derived data lives in the shared artifacts, which are bounded on
+        # their own; only the public keys belong to this curve.
+        return CURVE_SIZE + len(self.public_keys) * (
+            POINT_SIZE + self.field.bit_length() // 4
+        )
 
     def m(self, alph: str = None) -> int:
         return len(alph)
 
     def calculate_points(self) -> None:
-        self.points = []
         if self.a is None or self.b is None or self.field is None:
             raise ValueError(
                 f"Parameters not set! a: {self.a}, b: {self.b}, field: {self.field}"
             )
+        self.artifacts.points = tuple(self.iter_points())
+
+    def iter_points(self, start: int = 0):
+        """Yield the points of the curve with x >= start ordered by x and
+        then y, lazily."""
+        a, b, p = self.a, self.b, self.field
+        if not supported(p):
+            yield from self.__iter_points_slow(start)
+            return
+        params, make = self.params, Point._make
+        for block in range(start, p, BLOCK_SIZE):
+            xs, roots = _block_roots(a, b, p, block, min(block + BLOCK_SIZE, p))
+            for x, y in zip(xs, roots):
+                yield make(params, x, y)
+                if 0 < y and 2 * y != p:
+                    yield make(params, x, p - y)
 
-        for x in range(self.field):
-            y2 = (x**3 + self.a * x + self.b) % self.field
-            for y in range(self.field):
-                if y**2 % self.field == y2:
-                    self.points.append(Point(self, x, y))
+    def __iter_points_slow(self, start: int = 0):
+        a, b, p = self.a, self.b, self.field
+        params, make = self.params, Point._make
+        if not isprime(p):
+            roots = {}
+            for y in range(p):
+                roots.setdefault((y * y) % p, []).append(y)
+            for x in range(start, p):
+                for y in roots.get((x**3 + a * x + b) % p, []):
+                    yield make(params, x, y)
+            return
+        for x in range(start, p):
+            y = sqrt_mod(x**3 + a * x + b, p)
+            if y is not None:
+                yield make(params, x, y)
+                if y:
+                    yield make(params, x, p - y)
 
-    def steps(self, point: "Point", scalar: int) -> list:
-        result = []
-        for i in range(1, scalar + 1):
-            if not (point * i).at_infinity():
-                result.append(point * i)
-        return result
+    def steps(self, point: "Point", scalar: int, offset: int = 0, limit: int = None):
+        """Iterate over i * point for i in offset + 1..scalar, skipping the
+        point at infinity and stopping after `limit` values of i.
+
+        The first multiple is computed by the call itself, so invalid
+        arguments raise here rather than once the steps are being sent."""
+        stop = scalar if limit is None else min(scalar, offset + limit)
+        if offset >= stop:
+            return iter(())
+        start = point * (offset + 1)
+        return (
+            current
+            for current in progression(start, point, stop - offset)
+            if not current.at_infinity()
+        )
+
+    def y_for(self, x: int) -> int:
+        """Return the smallest y such that (x, y) is on the curve, or None."""
+        if self.field > POINTS_LIMIT:
+            return sqrt_mod(x**3 + self.a * x + self.b, self.field)
+        if self.artifacts.x_index is None:
+            x_index = {}
+            for point in self.iter_points():
+                x_index.setdefault(point.x, point.y)
+            self.artifacts.x_index = x_index
+        return self.artifacts.x_index.get(x)
+
+    def __encode_char(self, start: int) -> "Point":
+        for j in range(self.field):
+            x = (start + j) % self.field
+            y = self.y_for(x)
+            if y is not None:
+                return Point._make(self.params, x, y)
+        raise ValueError("No points on the curve!")
 
     def encode(self, alph: str, msg: str) -> list:
         if not alph:
@@ -95,21 +257,17 @@ class Curve:
             raise ValueError(
                 "Field too small! Must be greater than 2 * size of the alphabet"
             )
-        encoded = []
         h = self.field // self.m(alph)
-        for char in msg:
-            if char not in alph:
+        # Every occurrence of a character encodes to the same point, so each
+        # distinct character is looked up once, in message order so the first
+        # invalid one is reported.
+        indexes = {char: i for i, char in reversed(list(enumerate(alph)))}
+        points = {}
+        for char in dict.fromkeys(msg):
+            if char not in indexes:
                 raise ValueError(f"Invalid character! {char} not in alphabet.")
-            char_i = alph.index(char)
-            j = 0
-            while True:
-                x = (char_i * h + j) % self.field
-                if x in [point.x for point in self.points]:
-                    y = [point.y for point in self.points if point.x == x][0]
-                    break
-                j += 1
-            encoded.append(Point(self, x, y))
-        return encoded
+            points[char] = self.__encode_char(indexes[char] * h)
+        return [points[char] for char in msg]
 
     def decode(self, alph: str, points: list) -> str:
         if not alph:
@@ -118,15 +276,9 @@ class Curve:
             raise ValueError(
                 f"Invalid prime number! {self.field} must be greater than 2 * M (M = {self.m(alph)})."
             )
-        decoded = ""
         h = self.field // self.m(alph)
-        for point in points:
-            x = point.x
-            nearest = x
-            while nearest % h != 0 and nearest >= 0:
-                nearest -= 1
-            decoded += alph[nearest // h]
-        return decoded
+        # Each character owns the bucket [i * h, (i + 1) * h) of x values
+        return "".join(alph[point.x // h] for point in points)
 
     def encrypt(
         self,
@@ -145,24 +297,75 @@ class Curve:
 
         # Encrypt the message for multiple receivers
         if multiple:
-            return [Qm + encryption for Qm in self.encode(alph, msg)]
-        # Encrypt the message for a single receiver
+            return self.__translate(self.encode(alph, msg), encryption)
+        # Encrypt the message for a single receiver. The shared point and the
+        # sender's public key are the same for every point of the message.
+        shared, public_k = decryption * encryption, self.base * encryption
         return [
-            (Qm + (decryption * encryption), self.base * encryption)
-            for Qm in self.encode(alph, msg)
+            (Cm, public_k) for Cm in self.__translate(self.encode(alph, msg), shared)
         ]
 
+    def encrypt_bulk(
+        self, alph: str, messages: list, private_k: int, recipients: list
+    ) -> tuple:
+        """Encrypt many messages for many recipients with one private key.
+
+        Return the sender's public key and, for every recipient, the list of
+        encrypted messages. Each character is encoded once for the whole
+        batch and each recipient's shared point is computed once.
+        """
+        if not self.base:
+            raise ValueError("Base point not set!")
+        if private_k == 0:
+            raise ValueError("Private key not set!")
+        if any(recipient == Point(self) for recipient in recipients):
+            raise ValueError("Public key of the other party not set!")
+        chars = "".join(dict.fromkeys("".join(messages)))
+        encoded = self.encode(alph, chars)
+        shared = [recipient * private_k for recipient in recipients]
+        encrypted = []
+        for translated in self.__translate_all(encoded, shared):
+            table = dict(zip(chars, translated))
+            encrypted.append([[table[char] for char in msg] for msg in messages])
+        return self.base * private_k, encrypted
+
+    def __translate(self, points: list, offset: "Point") -> list:
+        return self.__translate_all(points, [offset])[0]
+
+    def __translate_all(self, points: list, offsets: list) -> list:
+        """Return [point + offset for every point] for every offset, adding
+        each distinct point once per offset, all in one batch when there are
+        enough."""
+        distinct = list(dict.fromkeys(points))
+        if len(distinct) * len(offsets) >= BATCH_MIN_POINTS and supported(self.field):
+            # Every distinct point is paired with every offset
+            points_batch = PointBatch.from_points(distinct, self.params)
+            offsets_batch = PointBatch.from_points(offsets, self.params)
+            sums = PointBatch(
+                self.params,
+                np.tile(points_batch.xs, len(offsets)),
+                np.tile(points_batch.ys, len(offsets)),
+            ) + PointBatch(
+                self.params,
+                np.repeat(offsets_batch.xs, len(distinct)),
+                np.repeat(offsets_batch.ys, len(distinct)),
+            )
+            sums = sums.to_points()
+        else:
+            sums = [point + offset for offset in offsets for point in distinct]
+        translated = []
+        for i in range(len(offsets)):
+            table = dict(zip(distinct, sums[i * len(distinct) : (i + 1) * len(distinct)]))
+            translated.append([table[point] for point in points])
+        return translated
+
     def decrypt(
         self, alph: str, points: list, private_k: int, public_k: "Point"
     ) -> str:
         if not self.base:
             raise ValueError("Base point not set!")
-        msg = ""
         if private_k == 0:
-            return msg
-        for encrypted in points:
-            decrypted = encrypted - (public_k * private_k)
-            if decrypted is None:
-                return ""
-            msg += self.decode(alph, [decrypted])
-        return msg
+            return ""
+        # The shared secret is the same for every point of the message
+        shared = -(public_k * private_k)
+        return self.decode(alph, [encrypted + shared for encrypted in points])
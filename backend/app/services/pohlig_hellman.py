@@ -1,9 +1,17 @@
-import time
 import math
-from sympy import primefactors, mod_inverse
+from sympy import factorint, mod_inverse
 
 from app.services.point_service import Point
 from app.services.curve_service import Curve
+from app.services.baby_step_giant_step import BabyStepGiantStep
+from app.services.pollard_rho import PollardRho
+from app.services.benchmarking import WARMUP_TRIES, measure
+from app.services.attack_cache import attack_cache, attack_key
+
+# Subgroups up to LINEAR_LIMIT elements are solved by walking the multiples of
+# G, up to BSGS_LIMIT with Baby-Step Giant-Step and with Pollard's rho beyond.
+LINEAR_LIMIT = 64
+BSGS_LIMIT = 1 << 32
 
 def prime_factors(n):
     factors = []
@@ -22,20 +30,93 @@ def prime_factors(n):
 
     return factors
 
+def linear_solver(ec: "Curve", G: "Point", A: "Point", q: int) -> int:
+    R = Point(ec, -1, -1)
+    for i in range(q):
+        if R == A:
+            return i
+        R = R + G
+    return None
+
+def bsgs_solver(ec: "Curve", G: "Point", A: "Point", q: int) -> int:
+    return BabyStepGiantStep(ec, math.isqrt(q) + 1, G, A, order=q, cache=False).attack()
+
+def rho_solver(ec: "Curve", G: "Point", A: "Point", q: int) -> int:
+    return PollardRho(ec, G, A, q).attack()
+
+def select_solver(q: int):
+    if q <= LINEAR_LIMIT:
+        return linear_solver
+    if q <= BSGS_LIMIT:
+        return bsgs_solver
+    return rho_solver
+
 class PohligHellman:
-    def __init__(self, ec: "Curve", G: "Point", A: "Point"):
+    """Pohlig-Hellman reduction of A = alpha * G to subgroups of prime order.
+
+    The order of G is derived from the factorization of Curve.n (or of the
+    curve order when unset), taken from `factors` when already known, and
+    split into prime powers q^e. Each q^e part of alpha is lifted one base-q
+    digit at a time, every digit being a discrete log in the subgroup of
+    order q solved by `solver(ec, G, A, q)`; by default the solver is chosen
+    from the subgroup size. The partial results are combined with the CRT.
+    """
+
+    def __init__(
+        self,
+        ec: "Curve",
+        G: "Point",
+        A: "Point",
+        solver=None,
+        cache: bool = True,
+        factors: dict = None,
+    ):
         self.ec = ec
         self.field = ec.field
         self.G = G
         self.A = A
-
-    def __discrete_log(self, q: int, G: "Point", A: "Point") -> "int":
-        R = Point(self.ec, -1, -1)
-        for i in range(q):
-            if R == A:
-                return i
-            R = R + G
-        return -1
+        self.order = ec.n if ec.n > 0 else ec.order()
+        if self.order <= 1:
+            raise ValueError("Curve order not set!")
+        # A known factorization {q: e} of the order spares factoring it
+        if factors is not None and math.prod(q**e for q, e in factors.items()) != self.order:
+            raise ValueError("Invalid factors! Their product must be the curve order.")
+        self.factors = factors
+        self.solver = solver
+        self.key = None
+        if cache:
+            self.key = attack_key("Pohlig-Hellman", ec, G, A, self.order)
+
+    def __discrete_log(self, q: int, G: "Point", A: "Point") -> int:
+        if A.at_infinity():
+            return 0
+        solver = self.solver or select_solver(q)
+        return solver(self.ec, G, A, q)
+
+    def __point_order(self) -> tuple:
+        # Strip from n every prime factor that G does not need. self.order
+        # and self.factors are left untouched, so every attack starts over
+        # from the order of the curve.
+        factors = self.factors or factorint(self.order)
+        factors = {int(q): int(e) for q, e in factors.items()}
+        order = self.order
+        for q in factors:
+            while factors[q] and (self.G * (order // q)).at_infinity():
+                order //= q
+                factors[q] -= 1
+        return order, {q: e for q, e in factors.items() if e}
+
+    def __lift(self, q: int, e: int, order: int) -> int:
+        # alpha mod q^e = d0 + d1 * q + ... + d(e-1) * q^(e-1)
+        Gq = self.G * (order // q)
+        x = 0
+        for k in range(e):
+            Ak = (self.A - self.G * x) * (order // q ** (k + 1))
+            digit = self.__discrete_log(q, Gq, Ak)
+            if digit is None:
+                return None
+            x += digit * q**k
+        return x
 
     def __resolve_congruences(self, congruences: list, mods: list) -> tuple:
         x = 0
@@ -48,54 +129,64 @@ class PohligHellman:
             x = (x + ai * Ni * mi) % N
         return x
 
-    def attack(self):
-        factors = primefactors(self.field)
+    def attack(self, cold: bool = False) -> int:
+        """Solve A = alpha * G, reusing a cached result unless `cold`."""
+        return attack_cache.solve(self.key, self.__attack, cold)
+
+    def __attack(self) -> int:
         congruences = []
         mods = []
 
-        for q in factors:
-            e = self.field // q
-            Ae = self.A * e
-            Ge = self.G * e
-            log = self.__discrete_log(q, Ge, Ae)
+        order, factors = self.__point_order()
+        for q, e in factors.items():
+            log = self.__lift(q, e, order)
+            if log is None:
+                return None
             congruences.append(log)
-            mods.append(q)
+            mods.append(q**e)
 
         x = self.__resolve_congruences(congruences, mods)
         return x
 
     @staticmethod
-    def benchmark(curves: list, num_tries: int = 50) -> list:
+    def benchmark(
+        curves: list,
+        num_tries: int = 50,
+        warmup: int = WARMUP_TRIES,
+        cache: bool = True,
+        stop=None,
+    ) -> list:
         results = []
         for data in curves:
-            curve = data[0]
-            ec = Curve(int(curve.a), int(curve.b), int(curve.field))
-            ec.base = Point(ec, int(curve.base.x), int(curve.base.y))
-            A = Point(ec, int(data[1].x), int(data[1].y))
-            attacker = PohligHellman(ec, ec.base, A)
-            success_count = 0
-            start = time.time()
-            for _ in range(num_tries):
-                alpha = attacker.attack()
-                if ec.base * alpha == A:
-                    success_count += 1
-            end = time.time()
-            elapsed_time = end - start
-            results.append((success_count, success_count / num_tries, elapsed_time))
+
+            def prepare():
+                curve = data[0]
+                ec = Curve(int(curve.a), int(curve.b), int(curve.field))
+                ec.base = Point(ec, int(curve.base.x), int(curve.base.y))
+                ec.n = int(curve.n)
+                A = Point(ec, int(data[1].x), int(data[1].y))
+                factors = data[2] if len(data) > 2 else None
+                attacker = PohligHellman(ec, ec.base, A, factors=factors)
+
+                def attempt(cold: bool = False) -> bool:
+                    alpha = attacker.attack(cold)
+                    return alpha is not None and ec.base * alpha == A
+
+                return attempt
+
+            results.append(measure(prepare, num_tries, warmup, cached=cache, stop=stop))
         return results
 
 
 def test_pohlig_hellman():
-    ec = Curve(0, 7)
-    ec.field = 89
+    ec = Curve(0, 7, 89)
     ec.base = Point(
-        ec.a,
-        ec.field,
+        ec,
         1,
         39,
     )
 
-    A = Point(ec.a, ec.field, 4, 58)
+    A = Point(ec, 4, 58)
     attacker = PohligHellman(ec, ec.base, A)
     alpha = attacker.attack()
     print(f"Private key: {alpha}")
@@ -0,0 +1,199 @@
+from functools import lru_cache
+from itertools import repeat
+import numpy as np
+from sympy import isprime
+
+from app.services.point_service import Point, CurveParams
+
+# Coordinates are kept in int64 arrays, so the product of two reduced
+# coordinates has to fit in 63 bits: only fields below 2^31 are batched.
+BATCH_FIELD_LIMIT = 1 << 31
+# Below this many points the NumPy call overhead outweighs the savings
+BATCH_MIN_POINTS = 512
+# Points advanced together by PointBatch.progression_blocks
+LANES = 1024
+
+
+def pow_mod(base: np.ndarray, exponent: int, p: int) -> np.ndarray:
+    """Element-wise base^exponent mod p, for values below 2^31."""
+    result = np.ones_like(base)
+    while exponent:
+        if exponent & 1:
+            result = (result * base) % p
+        base = (base * base) % p
+        exponent >>= 1
+    return result
+
+
+@lru_cache(maxsize=64)
+def supported(field: int) -> bool:
+    """Whether points over `field` can be batched: inverses are computed with
+    Fermat's little theorem, so the field has to be prime."""
+    return field < BATCH_FIELD_LIMIT and isprime(field)
+
+
+def batched(start: "Point", step: "Point", count: int) -> bool:
+    """Whether progression(start, step, count) is worth batching."""
+    return count >= BATCH_MIN_POINTS and supported(step.field)
+
+
+def _coordinates(points: list, field: int) -> tuple:
+    xs = [-1 if point.at_infinity() else point.x % field for point in points]
+    ys = [-1 if point.at_infinity() else point.y % field for point in points]
+    return np.array(xs, dtype=np.int64), np.array(ys, dtype=np.int64)
+
+
+def _add(x1, y1, x2, y2, a: int, p: int) -> tuple:
+    """Element-wise sum of affine points, with (-1, -1) as infinity."""
+    same = x1 == x2
+    double = same & (y1 == y2) & (y1 != 0)
+    num = np.where(double, (3 * (x1 * x1 % p) + a) % p, (y2 - y1) % p)
+    den = np.where(double, 2 * y1 % p, (x2 - x1) % p)
+    lamb = num * pow_mod(np.where(den == 0, 1, den), p - 2, p) % p
+    x3 = (lamb * lamb - x1 - x2) % p
+    y3 = (lamb * (x1 - x3) - y1) % p
+    # Inverse points, and vertical tangents when y = 0, add up to infinity
+    vertical = same & ~double
+    x3, y3 = np.where(vertical, -1, x3), np.where(vertical, -1, y3)
+    infinity1, infinity2 = x1 < 0, x2 < 0
+    x3 = np.where(infinity1, x2, np.where(infinity2, x1, x3))
+    y3 = np.where(infinity1, y2, np.where(infinity2, y1, y3))
+    return x3, y3
+
+
+class PointBatch:
+    """Points of one curve held as NumPy arrays of coordinates.
+
+    Arithmetic is element-wise over whole arrays, with a single Point as
+    operand broadcast to every element. Coordinates are reduced and the
+    point at infinity is (-1, -1), as for Point.
+
+    Attributes:
+        params: Parameters of the points' elliptic curve.
+        xs: x-coordinates of the points.
+        ys: y-coordinates of the points.
+
+    Methods:
+        from_points: Build a batch from a list of points.
+        to_points: Return the points of the batch as a list.
+        at_infinity: Return a mask of the points at infinity.
+        concatenate: Return the points of both batches in one.
+        __neg__: Return the negation of every point.
+        __add__: Add points element-wise.
+        double: Double every point.
+        __mul__: Multiply every point by a scalar, or by one scalar each.
+        progression: Yield start + i * step in blocks.
+    """
+
+    __slots__ = ("params", "xs", "ys")
+
+    def __init__(self, params: "CurveParams", xs: np.ndarray, ys: np.ndarray) -> None:
+        if not supported(params.field):
+            raise ValueError(
+                f"Invalid field! Batches need a prime below {BATCH_FIELD_LIMIT}."
+            )
+        self.params = params
+        self.xs, self.ys = xs, ys
+
+    @classmethod
+    def from_points(cls, points: list, params: "CurveParams" = None) -> "PointBatch":
+        params = params if params is not None else points[0].params
+        return cls(params, *_coordinates(points, params.field))
+
+    def to_points(self) -> list:
+        return list(map(Point._make, repeat(self.params), self.xs.tolist(), self.ys.tolist()))
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def __getitem__(self, index: slice) -> "PointBatch":
+        return PointBatch(self.params, self.xs[index], self.ys[index])
+
+    def at_infinity(self) -> np.ndarray:
+        return self.xs < 0
+
+    def concatenate(self, other: "PointBatch") -> "PointBatch":
+        return PointBatch(
+            self.params,
+            np.concatenate((self.xs, other.xs)),
+            np.concatenate((self.ys, other.ys)),
+        )
+
+    def __operand(self, other) -> tuple:
+        if isinstance(other, PointBatch):
+            return other.xs, other.ys
+        xs, ys = _coordinates([other], self.params.field)
+        return xs[0], ys[0]
+
+    def __neg__(self) -> "PointBatch":
+        ys = np.where(self.xs < 0, -1, -self.ys % self.params.field)
+        return PointBatch(self.params, self.xs, ys)
+
+    def __add__(self, other) -> "PointBatch":
+        a, field = self.params.a % self.params.field, self.params.field
+        return PointBatch(self.params, *_add(self.xs, self.ys, *self.__operand(other), a, field))
+
+    def __sub__(self, other) -> "PointBatch":
+        return self + (-other)
+
+    def double(self) -> "PointBatch":
+        return self + self
+
+    def __mul__(self, scalars) -> "PointBatch":
+        """Multiply by an integer, or element-wise by non-negative integers
+        below 2^63, with double-and-add over the bits of the largest one."""
+        infinity = np.full(len(self), -1, dtype=np.int64)
+        result = PointBatch(self.params, infinity, infinity)
+        if isinstance(scalars, int):
+            if scalars < 0:
+                return (-self) * -scalars
+            for bit in bin(scalars)[2:]:
+                result = result.double()
+                if bit == "1":
+                    result = result + self
+            return result
+
+        scalars = np.asarray(scalars, dtype=np.int64)
+        if len(scalars) and scalars.min() < 0:
+            raise ValueError("Invalid value! Scalars must be non-negative.")
+        for bit in range(int(scalars.max(initial=0)).bit_length() - 1, -1, -1):
+            result = result.double()
+            adding = ((scalars >> bit) & 1).astype(bool)
+            if adding.any():
+                added = result + self
+                result = PointBatch(
+                    self.params,
+                    np.where(adding, added.xs, result.xs),
+                    np.where(adding, added.ys, result.ys),
+                )
+        return result
+
+    @staticmethod
+    def progression_blocks(
+        start: "Point", step: "Point", count: int, lanes: int = LANES
+    ):
+        """Yield start + i * step for i in 0..count - 1, in blocks of `lanes`.
+
+        The first block is built by doubling its size, and each next block is
+        the previous one plus lanes * step, one array addition per block.
+        """
+        if count <= 0:
+            return
+        params, lanes = step.params, min(lanes, count)
+        block = PointBatch.from_points([start], params)
+        while len(block) < lanes:
+            block = block.concatenate(block + step * len(block))
+        block, stride = block[:lanes], step * lanes
+        while count > 0:
+            yield block[:count]
+            count -= lanes
+            if count > 0:
+                block = block + stride
+
+
+def batch_progression(start: "Point", step: "Point", count: int):
+    """Yield start + i * step for i in 0..count - 1, computed in blocks with
+    NumPy. The field has to be supported; point_service's progression calls
+    this when batched() holds."""
+    for block in PointBatch.progression_blocks(start, step, count):
+        yield from block.to_points()
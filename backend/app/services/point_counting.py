@@ -0,0 +1,108 @@
+import math
+import secrets
+from sympy import factorint, isprime
+
+from app.services.point_service import Point, CurveParams
+from app.utils import legendre, sqrt_mod
+
+# Fields up to this size are counted with a table of square roots in O(p);
+# larger prime fields use Mestre's baby-step giant-step order search, which
+# needs O(p^(1/4)) group operations and memory.
+TABLE_LIMIT = 1 << 20
+MESTRE_LIMIT = 1 << 64
+MESTRE_ATTEMPTS = 32
+
+
+def table_count(a: int, b: int, p: int) -> int:
+    """Number of points of y^2 = x^3 + ax + b over Z/pZ, including infinity."""
+    roots = [0] * p
+    for y in range(p):
+        roots[(y * y) % p] += 1
+    total = 1
+    for x in range(p):
+        total += roots[(x * x * x + a * x + b) % p]
+    return total
+
+
+def _random_point(a: int, b: int, p: int, params: "CurveParams") -> "Point":
+    while True:
+        x = secrets.randbelow(p)
+        y = sqrt_mod(x**3 + a * x + b, p)
+        if y is not None:
+            return Point._make(params, x, y)
+
+
+def _first_annihilator(Q: "Point", low: int, high: int) -> int:
+    """Smallest t in [low, high] with t * Q at infinity, by baby-step giant-step."""
+    width = high - low + 1
+    m = math.isqrt(width) + 1
+    baby_steps = {}
+    R = Point._make(Q.params, -1, -1)
+    for j in range(m):
+        baby_steps.setdefault(R, j)
+        R = R + Q
+    stride = Q * m
+    R = Q * low
+    for i in range(-(-width // m)):
+        j = baby_steps.get(-R)
+        if j is not None and low + i * m + j <= high:
+            return low + i * m + j
+        R = R + stride
+    return None
+
+
+def _point_order(P: "Point", multiple: int) -> int:
+    order = multiple
+    for q in factorint(multiple):
+        while order % q == 0 and (P * (order // q)).at_infinity():
+            order //= q
+    return order
+
+
+def mestre_count(a: int, b: int, p: int) -> int:
+    """Number of points found from the orders of random points, or None.
+
+    The group exponent L is grown as the lcm of point orders until only one
+    multiple of L lies in the Hasse interval [p + 1 - 2 sqrt(p), p + 1 + 2 sqrt(p)].
+    """
+    params = CurveParams(a % p, p)
+    low = p + 1 - 2 * math.isqrt(p) - 2
+    high = p + 1 + 2 * math.isqrt(p) + 2
+    L = 1
+    for _ in range(MESTRE_ATTEMPTS):
+        P = _random_point(a, b, p, params)
+        Q = P * L
+        if not Q.at_infinity():
+            t = _first_annihilator(Q, -(-low // L), high // L)
+            if t is None:
+                return None
+            L = math.lcm(L, _point_order(P, L * t))
+        first = -(-low // L)
+        if first == high // L:
+            return first * L
+    return None
+
+
+def count_points(a: int, b: int, p: int) -> int:
+    """Order of the group E(F_p) of y^2 = x^3 + ax + b, point at infinity included."""
+    if p <= TABLE_LIMIT:
+        return table_count(a, b, p)
+    if not isprime(p):
+        raise ValueError("Not a prime number!")
+    if (4 * a**3 + 27 * b**2) % p == 0:
+        raise ValueError("Singular curve!")
+    if p > MESTRE_LIMIT:
+        raise ValueError("Field too large to count points! Set the order n instead.")
+
+    order = mestre_count(a, b, p)
+    if order is not None:
+        return order
+    # Either the curve or its quadratic twist has a point whose order has a
+    # unique multiple in the Hasse interval; #E + #E' = 2p + 2.
+    d = 2
+    while legendre(d, p) != -1:
+        d += 1
+    order = mestre_count(a * d * d % p, b * d**3 % p, p)
+    if order is None:
+        raise ValueError("Could not compute the order of the curve!")
+    return 2 * p + 2 - order
@@ -1,12 +1,121 @@
 import json
 from typing import Any
-from app.utils import simplify_fraction, euclid_extended
+from app.utils import mod_inverse, batch_inverse
+
+
+# Fixed-base tables split scalars into windows of this many bits
+WINDOW_WIDTH = 4
+
+# multi_mul recodes scalars in width-w NAF, w growing with the scalar size:
+# larger windows mean fewer additions but bigger tables of odd multiples.
+NAF_WIDTHS = [(192, 5), (48, 4), (0, 3)]
+
+# Runs of consecutive points are built in Jacobian coordinates and brought
+# back to affine ones in batches sharing one inversion. Below this field size
+# an inversion is cheap enough that affine additions are faster.
+BATCH_SIZE = 256
+BATCH_MIN_BITS = 40
+
+# Jacobian coordinates (X, Y, Z) represent the affine point (X / Z^2, Y / Z^3).
+# Any triple with Z == 0 is the point at infinity.
+JACOBIAN_INFINITY = (1, 1, 0)
+
+
+def _jacobian_double(point: tuple, a: int, field: int) -> tuple:
+    X, Y, Z = point
+    if not Y or not Z:
+        return JACOBIAN_INFINITY
+    YY = (Y * Y) % field
+    S = (4 * X * YY) % field
+    ZZ = (Z * Z) % field
+    M = (3 * X * X + a * ZZ * ZZ) % field
+    X3 = (M * M - 2 * S) % field
+    Y3 = (M * (S - X3) - 8 * YY * YY) % field
+    Z3 = (2 * Y * Z) % field
+    return (X3, Y3, Z3)
+
+
+def _jacobian_add(point: tuple, x: int, y: int, a: int, field: int) -> tuple:
+    """Add the affine point (x, y) to a point in Jacobian coordinates."""
+    X1, Y1, Z1 = point
+    if not Z1:
+        return (x, y, 1)
+    Z1Z1 = (Z1 * Z1) % field
+    U2 = (x * Z1Z1) % field
+    S2 = (y * Z1 * Z1Z1) % field
+    H = (U2 - X1) % field
+    r = (S2 - Y1) % field
+    if not H:
+        if not r:
+            return _jacobian_double(point, a, field)
+        return JACOBIAN_INFINITY
+    HH = (H * H) % field
+    HHH = (H * HH) % field
+    V = (X1 * HH) % field
+    X3 = (r * r - HHH - 2 * V) % field
+    Y3 = (r * (V - X3) - Y1 * HHH) % field
+    Z3 = (Z1 * H) % field
+    return (X3, Y3, Z3)
+
+
+def _jacobian_to_affine(point: tuple, field: int) -> tuple:
+    X, Y, Z = point
+    if not Z:
+        return (-1, -1)
+    z_inv = mod_inverse(Z, field)
+    z_inv2 = (z_inv * z_inv) % field
+    return ((X * z_inv2) % field, (Y * z_inv2 * z_inv) % field)
+
+
+def _jacobian_to_affine_batch(points: list, field: int) -> list:
+    """Convert many Jacobian points to affine ones with a single inversion."""
+    inverses = iter(batch_inverse([Z for _, _, Z in points if Z], field))
+    affine = []
+    for X, Y, Z in points:
+        if not Z:
+            affine.append((-1, -1))
+            continue
+        z_inv = next(inverses)
+        z_inv2 = (z_inv * z_inv) % field
+        affine.append(((X * z_inv2) % field, (Y * z_inv2 * z_inv) % field))
+    return affine
+
+
+class CurveParams:
+    """Curve parameters shared by every point of a curve.
+
+    Attributes:
+        a: Coefficient of the curve.
+        field: Finite field of the curve.
+    """
+
+    __slots__ = ("a", "field")
+
+    def __init__(self, a: int, field: int) -> None:
+        if not isinstance(a, int) or not isinstance(field, int):
+            raise ValueError("Invalid value! a and field must be integers.")
+        self.a, self.field = a, field
+
+    def __reduce__(self) -> tuple:
+        return (CurveParams, (self.a, self.field))
+
+
+_new = object.__new__
+_set = object.__setattr__
 
 
 class Point:
     """Class representing a point on an elliptic curve.
 
+    Points are immutable and hashable. The constructor validates its
+    arguments; internal arithmetic builds points through _make instead.
+
+    The point at infinity is (-1, -1). (0, 0), the default point, is an
+    ordinary point to the arithmetic: it only lies on curves with b = 0,
+    where it has order 2.
+
     Attributes:
+        params: Parameters of the point's elliptic curve.
         a: Coefficient.
         field: Finite field of point's elliptic curve.
         x: x-coordinate of the point.
@@ -14,8 +123,9 @@ class Point:
 
     Methods:
         at_infinity: Check if a point is at infinity.
-        point_zero: Check if a point is the point at zero.
+        point_zero: Check if a point is (0, 0), the unset point of a curve.
         __eq__: Check if two points are equal.
+        __hash__: Hash the coordinates of the point.
         __neg__: Return the negation of the point.
         __add__: Add two points.
         __sub__: Subtract two points.
@@ -24,72 +134,103 @@ class Point:
         to_json: Return a JSON representation of the point.
     """
 
+    __slots__ = ("params", "x", "y")
+
     def __init__(self, params, x=0, y=0):
-        self.a, self.field, self.x, self.y = params.a, params.field, x, y
+        if not isinstance(x, int) or not isinstance(y, int):
+            raise ValueError("Invalid value! x and y must be integers.")
+        shared = getattr(params, "params", None)
+        if isinstance(params, CurveParams):
+            shared = params
+        elif not isinstance(shared, CurveParams):
+            shared = CurveParams(params.a, params.field)
+        _set(self, "params", shared)
+        _set(self, "x", x)
+        _set(self, "y", y)
+
+    @classmethod
+    def _make(cls, params: "CurveParams", x: int, y: int) -> "Point":
+        point = _new(cls)
+        _set(point, "params", params)
+        _set(point, "x", x)
+        _set(point, "y", y)
+        return point
 
     def __setattr__(self, __name: str, __value: Any) -> None:
-        if __name in ["a", "field", "x", "y"] and not isinstance(__value, int):
-            raise ValueError(f"Invalid value! {__name} must be an integer.")
-        super().__setattr__(__name, __value)
+        raise AttributeError("Points are immutable!")
+
+    def __reduce__(self) -> tuple:
+        return (Point, (self.params, self.x, self.y))
+
+    @property
+    def a(self) -> int:
+        return self.params.a
+
+    @property
+    def field(self) -> int:
+        return self.params.field
 
     def at_infinity(self) -> bool:
-        return (self.x, self.y) == (-1, -1)
+        return self.x == -1 and self.y == -1
 
     def point_zero(self) -> bool:
-        return (self.x, self.y) == (0, 0)
+        return self.x == 0 and self.y == 0
 
     def __eq__(self, other: "Point") -> bool:
-        return (self.x, self.y) == (other.x, other.y)
+        if not isinstance(other, Point):
+            return NotImplemented
+        return self.x == other.x and self.y == other.y
+
+    def __hash__(self) -> int:
+        return hash((self.x, self.y))
 
     def __neg__(self) -> "Point":
-        return Point(self, self.x, -self.y)
+        if self.at_infinity():
+            return self
+        return Point._make(self.params, self.x, -self.y % self.params.field)
 
     def __add__(self, other: "Point") -> "Point":
-        # Check if either point is at infinity or the point at zero
-        if self.at_infinity() or self.point_zero():
+        x1, y1, x2, y2 = self.x, self.y, other.x, other.y
+        # Check if either point is at infinity
+        if x1 == -1 and y1 == -1:
             return other
-        if other.at_infinity() or other.point_zero():
+        if x2 == -1 and y2 == -1:
             return self
 
-        # Check if points are inverses of each other
-        if self == -other:
-            return Point(self, -1, -1)
-
-        # Check if points are the same
-        if self == other:
-            fraction = (3 * self.x**2 + self.a), (2 * self.y)
+        params = self.params
+        field = params.field
+        if x1 == x2:
+            # Inverse points, or a vertical tangent when y = 0
+            if y1 != y2 or (2 * y1) % field == 0:
+                return Point._make(params, -1, -1)
+            num, den = 3 * x1 * x1 + params.a, 2 * y1
         else:
-            fraction = (other.y - self.y), (other.x - self.x)
-
-        # Handle case where simplified fraction is infinity
-        if simplify_fraction(fraction) == (-1, -1):
-            return Point(self, -1, -1)
-
-        num, den = simplify_fraction(fraction)
-        lamb = (num * euclid_extended(abs(den), self.field)[1]) % self.field
-        x3 = (lamb**2 - self.x - other.x) % self.field
-        y3 = (lamb * (self.x - x3) - self.y) % self.field
+            num, den = y2 - y1, x2 - x1
 
-        return Point(self, x3, y3)
+        lamb = (num * mod_inverse(den % field, field)) % field
+        x3 = (lamb * lamb - x1 - x2) % field
+        y3 = (lamb * (x1 - x3) - y1) % field
+        return Point._make(params, x3, y3)
 
     def __sub__(self, other: "Point") -> "Point":
         return self + (-other)
 
     def __mul__(self, scalar: int) -> "Point":
         if scalar == 0 or self.at_infinity():
-            return Point(self, -1, -1)
-
-        result = Point(self)
-        addend = Point(self, self.x, self.y)
-        while scalar:
-            if scalar & 1:
-                if result == Point(self):
-                    result = Point(self, addend.x, addend.y)
-                else:
-                    result += addend
-            addend += addend
-            scalar >>= 1
-        return result
+            return Point._make(self.params, -1, -1)
+        if scalar < 0:
+            return (-self) * -scalar
+
+        # Double-and-add in Jacobian coordinates, so the only modular
+        # inversion is the final conversion back to affine coordinates.
+        a, field = self.params.a, self.params.field
+        x, y = self.x % field, self.y % field
+        result = JACOBIAN_INFINITY
+        for bit in bin(scalar)[2:]:
+            result = _jacobian_double(result, a, field)
+            if bit == "1":
+                result = _jacobian_add(result, x, y, a, field)
+        return Point._make(self.params, *_jacobian_to_affine(result, field))
 
     def __str__(self) -> str:
         if self.at_infinity():
@@ -100,3 +241,184 @@ class Point:
         if self.at_infinity():
             return json.dumps({"x": -1, "y": -1}, indent=4)
         return json.dumps({"x": self.x, "y": self.y}, indent=4)
+
+
+class FixedBaseTable:
+    """Window table of a fixed point P for scalars of up to `bits` bits.
+
+    Row i holds the affine multiples j * 2^(w * i) * P for j in 1..2^w - 1,
+    so k * P is one table addition per w-bit window of k and no doublings.
+    """
+
+    def __init__(self, point: "Point", bits: int, width: int = WINDOW_WIDTH) -> None:
+        self.point = point
+        self.bits = bits
+        self.width = width
+        a, field = point.a, point.field
+        rows = []
+        x, y = point.x % field, point.y % field
+        for _ in range(-(-bits // width)):
+            multiples = []
+            multiple = JACOBIAN_INFINITY
+            for _ in range((1 << width) - 1):
+                multiple = _jacobian_add(multiple, x, y, a, field)
+                multiples.append(multiple)
+            # The next row starts at 2^w times the current window's unit;
+            # it is normalised together with the row.
+            multiples.append(_jacobian_add(multiple, x, y, a, field))
+            *row, (x, y) = _jacobian_to_affine_batch(multiples, field)
+            rows.append(row)
+            if (x, y) == (-1, -1):
+                break
+        self.rows = rows
+
+    def multiply(self, scalar: int) -> "Point":
+        a, field = self.point.a, self.point.field
+        mask = (1 << self.width) - 1
+        result = JACOBIAN_INFINITY
+        for row in self.rows:
+            if not scalar:
+                break
+            digit = scalar & mask
+            if digit and row[digit - 1] != (-1, -1):
+                result = _jacobian_add(result, *row[digit - 1], a, field)
+            scalar >>= self.width
+        return Point._make(self.point.params, *_jacobian_to_affine(result, field))
+
+
+class FixedBasePoint(Point):
+    """Point that is multiplied often, such as a curve's base point.
+
+    The first multiplication builds a FixedBaseTable that later ones reuse.
+    """
+
+    __slots__ = ("_table",)
+
+    def __init__(self, params, x=0, y=0):
+        super().__init__(params, x, y)
+        _set(self, "_table", None)
+
+    def __reduce__(self) -> tuple:
+        return (FixedBasePoint, (self.params, self.x, self.y))
+
+    def __mul__(self, scalar: int) -> "Point":
+        bits = self.field.bit_length() + 1
+        if scalar <= 0 or scalar.bit_length() > bits or self.at_infinity():
+            return super().__mul__(scalar)
+        if self._table is None:
+            _set(self, "_table", FixedBaseTable(self, bits))
+        return self._table.multiply(scalar)
+
+
+def progression(start: "Point", step: "Point", count: int):
+    """Yield start + i * step for i in 0..count - 1.
+
+    Long progressions on small prime fields are computed with NumPy by
+    point_batch's batch_progression. On large fields the points are chained
+    in Jacobian coordinates and normalised BATCH_SIZE at a time, one
+    inversion per batch instead of one per addition.
+    """
+    # point_batch builds on this module, so it is imported on first use
+    from app.services.point_batch import batch_progression, batched
+
+    if batched(start, step, count):
+        yield from batch_progression(start, step, count)
+        return
+    field = step.field
+    if field.bit_length() < BATCH_MIN_BITS or step.at_infinity():
+        current = start
+        for _ in range(count):
+            yield current
+            current = current + step
+        return
+
+    params, make = step.params, Point._make
+    a, x, y = params.a, step.x % field, step.y % field
+    if start.at_infinity():
+        current = JACOBIAN_INFINITY
+    else:
+        current = (start.x % field, start.y % field, 1)
+    while count > 0:
+        batch = []
+        for _ in range(min(count, BATCH_SIZE)):
+            batch.append(current)
+            current = _jacobian_add(current, x, y, a, field)
+        for point in _jacobian_to_affine_batch(batch, field):
+            yield make(params, *point)
+        count -= len(batch)
+
+
+def _wnaf(scalar: int, width: int) -> list:
+    """Width-w NAF digits of a non-negative scalar, least significant first.
+
+    Non-zero digits are odd, below 2^(w - 1) in absolute value and followed
+    by at least w - 1 zeros.
+    """
+    digits = []
+    modulus, half = 1 << width, 1 << (width - 1)
+    while scalar:
+        digit = 0
+        if scalar & 1:
+            digit = scalar % modulus
+            if digit >= half:
+                digit -= modulus
+            scalar -= digit
+        digits.append(digit)
+        scalar >>= 1
+    return digits
+
+
+def _odd_multiples(point: "Point", count: int) -> list:
+    """Affine P, 3P, 5P, ... (2 * count - 1)P, with (-1, -1) for infinity."""
+    a, field = point.a, point.field
+    x, y = point.x % field, point.y % field
+    twice = _jacobian_to_affine(_jacobian_double((x, y, 1), a, field), field)
+    if twice == (-1, -1):
+        return [(x, y)] * count
+    multiples = [(x, y, 1)]
+    for _ in range(count - 1):
+        multiples.append(_jacobian_add(multiples[-1], *twice, a, field))
+    return _jacobian_to_affine_batch(multiples, field)
+
+
+def multi_mul(terms: list) -> "Point":
+    """Return k1 * P1 + k2 * P2 + ... for a list of (point, scalar) pairs.
+
+    Straus' method over width-w NAF recodings: a single chain of doublings,
+    as long as the longest scalar, is shared by every term, and each term
+    only adds a precomputed odd multiple of its point at its non-zero digits.
+    Points must belong to the same curve.
+    """
+    if not terms:
+        raise ValueError("No terms to multiply!")
+    params = terms[0][0].params
+    a, field = params.a, params.field
+
+    nafs, tables = [], []
+    for point, scalar in terms:
+        if point.a != a or point.field != field:
+            raise ValueError("Points must belong to the same curve!")
+        if scalar == 0 or point.at_infinity():
+            continue
+        if scalar < 0:
+            point, scalar = -point, -scalar
+        width = next(w for bits, w in NAF_WIDTHS if scalar.bit_length() > bits)
+        nafs.append(_wnaf(scalar, width))
+        tables.append(_odd_multiples(point, 1 << (width - 2)))
+    if not nafs:
+        return Point._make(params, -1, -1)
+
+    result = JACOBIAN_INFINITY
+    for i in range(max(len(naf) for naf in nafs) - 1, -1, -1):
+        result = _jacobian_double(result, a, field)
+        for naf, table in zip(nafs, tables):
+            digit = naf[i] if i < len(naf) else 0
+            if not digit:
+                continue
+            x, y = table[abs(digit) // 2]
+            if (x, y) == (-1, -1):
+                continue
+            if digit < 0:
+                y = -y % field
+            result = _jacobian_add(result, x, y, a, field)
+    return Point._make(params, *_jacobian_to_affine(result, field))
@@ -0,0 +1,225 @@
+import math
+import random
+import secrets
+
+from app.services.point_service import Point
+from app.services.curve_service import Curve
+from app.services.benchmarking import WARMUP_TRIES, measure
+from app.services.attack_cache import attack_cache, attack_key
+
+# Number of partitions of the r-adding walk. Teske showed that r = 20 behaves
+# like a truly random walk; 16 keeps the partition function a cheap mask.
+PARTITIONS = 16
+MAX_RESTARTS = 20
+# Largest gcd(d, order) whose candidate solutions are checked one by one
+MAX_CANDIDATES = 1 << 12
+
+
+def _partition(point: "Point", size: int) -> int:
+    return point.x % size if not point.at_infinity() else size - 1
+
+
+class PollardRho:
+    """Pollard's rho for the discrete logarithm A = alpha * G.
+
+    Walks the group with an r-adding walk keeping every point as c * G + d * A
+    and detects the cycle with Brent's algorithm, so memory use is constant.
+    The order of G (or a multiple of it) must be known. A seeded
+    random.Random can be given as `rng` to make the walks reproducible.
+    """
+
+    def __init__(
+        self, ec: "Curve", G: "Point", A: "Point", order: int = None, rng=None
+    ):
+        self.ec = ec
+        self.G = G
+        self.A = A
+        self.order = order if order else ec.n
+        self.rng = rng if rng is not None else secrets.SystemRandom()
+        if not self.order:
+            raise ValueError("Curve order not set!")
+
+    def __walk(self) -> tuple:
+        steps = []
+        for _ in range(PARTITIONS):
+            c, d = self.rng.randrange(self.order), self.rng.randrange(self.order)
+            steps.append((self.G * c + self.A * d, c, d))
+
+        def step(state: tuple) -> tuple:
+            X, c, d = state
+            R, cj, dj = steps[_partition(X, PARTITIONS)]
+            return (X + R, (c + cj) % self.order, (d + dj) % self.order)
+
+        c0, d0 = self.rng.randrange(self.order), self.rng.randrange(self.order)
+        return step, (self.G * c0 + self.A * d0, c0, d0)
+
+    def __solve(self, tortoise: tuple, hare: tuple) -> int:
+        # c1 + d1 * alpha = c2 + d2 * alpha  (mod order)
+        _, c1, d1 = tortoise
+        _, c2, d2 = hare
+        d = (d1 - d2) % self.order
+        c = (c2 - c1) % self.order
+        g = math.gcd(d, self.order)
+        if d == 0 or c % g != 0 or g > MAX_CANDIDATES:
+            return None
+        reduced = self.order // g
+        base = (c // g) * pow(d // g, -1, reduced) % reduced
+        for k in range(g):
+            alpha = base + k * reduced
+            if self.G * alpha == self.A:
+                return alpha
+        return None
+
+    def attack(self) -> int:
+        if self.A.at_infinity() or self.G.at_infinity():
+            return 0
+        limit = 4 * math.isqrt(self.order) + PARTITIONS
+        for _ in range(MAX_RESTARTS):
+            step, tortoise = self.__walk()
+            hare = step(tortoise)
+            power = cycle = 1
+            for _ in range(limit):
+                if tortoise[0] == hare[0]:
+                    break
+                if power == cycle:
+                    tortoise = hare
+                    power *= 2
+                    cycle = 0
+                hare = step(hare)
+                cycle += 1
+            else:
+                continue
+            alpha = self.__solve(tortoise, hare)
+            if alpha is not None:
+                return alpha
+        return None
+
+    @staticmethod
+    def benchmark(
+        curves: list,
+        num_tries: int = 50,
+        warmup: int = WARMUP_TRIES,
+        seed: int = None,
+        stop=None,
+    ) -> list:
+        results = []
+        for data in curves:
+
+            def prepare():
+                curve = data[0]
+                ec = Curve(int(curve.a), int(curve.b), int(curve.field))
+                ec.base = Point(ec, int(curve.base.x), int(curve.base.y))
+                ec.n = int(curve.n)
+                A = Point(ec, int(data[1].x), int(data[1].y))
+                rng = random.Random(seed) if seed is not None else None
+                attacker = PollardRho(ec, ec.base, A, rng=rng)
+
+                def attempt() -> bool:
+                    alpha = attacker.attack()
+                    return alpha is not None and ec.base * alpha == A
+
+                return attempt
+
+            results.append(measure(prepare, num_tries, warmup, stop=stop))
+        return results
+
+
+class PollardKangaroo:
+    """Pollard's lambda (kangaroo) method for alpha known to lie in [lower, upper].
+
+    A tame kangaroo starting at upper * G sets a trap at the end of its run and
+    a wild kangaroo starting at A follows until it falls into the trap or
+    overtakes it. Only the two kangaroos are stored.
+    """
+
+    def __init__(
+        self,
+        ec: "Curve",
+        G: "Point",
+        A: "Point",
+        lower: int = 0,
+        upper: int = None,
+        cache: bool = True,
+    ):
+        self.ec = ec
+        self.G = G
+        self.A = A
+        self.lower = lower
+        self.upper = upper if upper is not None else ec.n - 1
+        self.cache = cache
+        if self.upper < self.lower:
+            raise ValueError("Invalid interval! upper must be at least lower.")
+
+    def __jumps(self) -> list:
+        width = self.upper - self.lower
+        # Powers of two whose mean is about sqrt(width) / 2
+        target = max(1, math.isqrt(width) // 2)
+        k = 1
+        while (2**k - 1) // k < target:
+            k += 1
+        return [2**i for i in range(k)]
+
+    def attack(self, cold: bool = False) -> int:
+        """Solve A = alpha * G, reusing a cached result unless `cold`."""
+        key = None
+        if self.cache:
+            key = attack_key(
+                "Pollard's Kangaroo", self.ec, self.G, self.A, self.lower, self.upper
+            )
+        return attack_cache.solve(key, self.__attack, cold)
+
+    def __attack(self) -> int:
+        width = self.upper - self.lower
+        jumps = self.__jumps()
+        jump_points = [self.G * jump for jump in jumps]
+        tame_steps = 2 * math.isqrt(width) + 1
+
+        for salt in range(MAX_RESTARTS):
+            size = len(jumps)
+
+            def index(point: "Point") -> int:
+                return (_partition(point, size) + salt) % size
+
+            tame, tame_distance = self.G * self.upper, 0
+            for _ in range(tame_steps):
+                j = index(tame)
+                tame, tame_distance = tame + jump_points[j], tame_distance + jumps[j]
+
+            wild, wild_distance = self.A, 0
+            while wild_distance <= width + tame_distance:
+                if wild == tame:
+                    alpha = self.upper + tame_distance - wild_distance
+                    if self.G * alpha == self.A:
+                        return alpha
+                    break
+                j = index(wild)
+                wild, wild_distance = wild + jump_points[j], wild_distance + jumps[j]
+        return None
+
+    @staticmethod
+    def benchmark(
+        curves: list,
+        num_tries: int = 50,
+        warmup: int = WARMUP_TRIES,
+        cache: bool = True,
+        stop=None,
+    ) -> list:
+        results = []
+        for data in curves:
+
+            def prepare():
+                curve = data[0]
+                ec = Curve(int(curve.a), int(curve.b), int(curve.field))
+                ec.base = Point(ec, int(curve.base.x), int(curve.base.y))
+                ec.n = int(curve.n)
+                A = Point(ec, int(data[1].x), int(data[1].y))
+                attacker = PollardKangaroo(ec, ec.base, A, int(data[2]), int(data[3]))
+
+                def attempt(cold: bool = False) -> bool:
+                    alpha = attacker.attack(cold)
+                    return alpha is not None and ec.base * alpha == A
+
+                return attempt
+
+            results.append(measure(prepare, num_tries, warmup, cached=cache, stop=stop))
+        return results
@@ -0,0 +1,242 @@
+import json
+import time
+import sqlite3
+import threading
+from contextlib import closing, contextmanager
+from collections import OrderedDict
+
+from app.services.point_service import Point
+from app.services.curve_service import Curve
+
+# Curves rebuilt by each SQLiteSessionStore and kept in its process, so a
+# lookup whose stored data has not changed skips load_curve.
+LOADED_CURVES_SIZE = 256
+
+
+def dump_curve(curve: "Curve") -> str:
+    """Serialize the parameters and keys of a curve; derived data is left out."""
+    return json.dumps(
+        {
+            "a": curve.a,
+            "b": curve.b,
+            "field": curve.field,
+            "n": curve.n,
+            "simulation": curve.simulation,
+            "base": [curve.base.x, curve.base.y],
+            "public_keys": {
+                key: [point.x, point.y] for key, point in curve.public_keys.items()
+            },
+        }
+    )
+
+
+def load_curve(data: str) -> "Curve":
+    """Rebuild a curve from `dump_curve`; points and tables are recomputed lazily."""
+    data = json.loads(data)
+    curve = Curve(data["a"], data["b"], data["field"], data["simulation"])
+    curve.n = data["n"]
+    curve.base = Point(curve, *data["base"])
+    for key, (x, y) in data["public_keys"].items():
+        curve.public_keys[key] = Point(curve, x, y)
+    return curve
+
+
+class MemorySessionStore:
+    """In-process store of the curve of each session.
+
+    Sessions idle for more than `ttl` seconds expire, and the least recently
+    used ones are evicted once there are more than `max_sessions` of them or
+    their estimated footprint exceeds `max_memory` bytes. The footprint of a
+    session is measured when it is stored, so public keys added to a curve
+    count once the curve is stored again.
+    """
+
+    def __init__(
+        self, ttl: int = 3600, max_sessions: int = 1000, max_memory: int = None
+    ) -> None:
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.max_memory = max_memory
+        self.sessions = OrderedDict()
+        # Sum of the footprints of the sessions, each measured when stored
+        self.footprint = 0
+        self._lock = threading.Lock()
+
+    def __discard(self, uid: str) -> None:
+        _, _, footprint = self.sessions.pop(uid)
+        self.footprint -= footprint
+
+    def __evict(self) -> None:
+        now = time.time()
+        while self.sessions:
+            uid, (_, accessed, _) = next(iter(self.sessions.items()))
+            if now - accessed <= self.ttl:
+                break
+            self.__discard(uid)
+        while len(self.sessions) > self.max_sessions:
+            self.__discard(next(iter(self.sessions)))
+        if self.max_memory is not None:
+            while len(self.sessions) > 1 and self.footprint > self.max_memory:
+                self.__discard(next(iter(self.sessions)))
+
+    def get(self, uid: str) -> "Curve":
+        with self._lock:
+            self.__evict()
+            if uid not in self.sessions:
+                return None
+            curve, _, footprint = self.sessions.pop(uid)
+            self.sessions[uid] = (curve, time.time(), footprint)
+            return curve
+
+    def __contains__(self, uid: str) -> bool:
+        return self.get(uid) is not None
+
+    def __getitem__(self, uid: str) -> "Curve":
+        curve = self.get(uid)
+        if curve is None:
+            raise KeyError(uid)
+        return curve
+
+    def __setitem__(self, uid: str, curve: "Curve") -> None:
+        footprint = curve.footprint()
+        with self._lock:
+            if uid in self.sessions:
+                self.__discard(uid)
+            self.sessions[uid] = (curve, time.time(), footprint)
+            self.footprint += footprint
+            self.__evict()
+
+    def __delitem__(self, uid: str) -> None:
+        with self._lock:
+            self.__discard(uid)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self.__evict()
+            return len(self.sessions)
+
+
+class SQLiteSessionStore:
+    """Store of sessions in a SQLite file shared by every worker process.
+
+    Only the curve parameters, base point and public keys are stored. Each
+    process keeps the curves it rebuilt and reuses one while it still matches
+    the stored data; otherwise the curve is rebuilt, and its points and
+    tables come from the shared CurveArtifacts of its parameters, so idle
+    sessions take little memory. Curves are values here: changes to a curve
+    only persist once it is stored again.
+    """
+
+    def __init__(self, path: str, ttl: int = 3600, max_sessions: int = 1000) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self.curves = OrderedDict()
+        self._lock = threading.Lock()
+        with self.__connect() as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS sessions"
+                " (uid TEXT PRIMARY KEY, curve TEXT NOT NULL, accessed REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS sessions_accessed ON sessions (accessed)"
+            )
+
+    @contextmanager
+    def __connect(self):
+        # The connection's own context manager only commits or rolls back
+        with closing(sqlite3.connect(self.path, timeout=30)) as connection:
+            with connection:
+                yield connection
+
+    def __keep(self, uid: str, curve: "Curve") -> None:
+        with self._lock:
+            self.curves.pop(uid, None)
+            self.curves[uid] = curve
+            while len(self.curves) > LOADED_CURVES_SIZE:
+                self.curves.popitem(last=False)
+
+    def __load(self, uid: str, data: str) -> "Curve":
+        with self._lock:
+            curve = self.curves.get(uid)
+        # A kept curve changed without being stored again is rebuilt
+        if curve is None or dump_curve(curve) != data:
+            curve = load_curve(data)
+        self.__keep(uid, curve)
+        return curve
+
+    def get(self, uid: str) -> "Curve":
+        now = time.time()
+        with self.__connect() as connection:
+            row = connection.execute(
+                "SELECT curve FROM sessions WHERE uid = ? AND accessed >= ?",
+                (uid, now - self.ttl),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE sessions SET accessed = ? WHERE uid = ?", (now, uid)
+            )
+        return self.__load(uid, row[0])
+
+    def __contains__(self, uid: str) -> bool:
+        with self.__connect() as connection:
+            row = connection.execute(
+                "SELECT 1 FROM sessions WHERE uid = ? AND accessed >= ?",
+                (uid, time.time() - self.ttl),
+            ).fetchone()
+        return row is not None
+
+    def __getitem__(self, uid: str) -> "Curve":
+        curve = self.get(uid)
+        if curve is None:
+            raise KeyError(uid)
+        return curve
+
+    def __setitem__(self, uid: str, curve: "Curve") -> None:
+        now = time.time()
+        with self.__connect() as connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sessions (uid, curve, accessed) VALUES (?, ?, ?)",
+                (uid, dump_curve(curve), now),
+            )
+            connection.execute(
+                "DELETE FROM sessions WHERE accessed < ?", (now - self.ttl,)
+            )
+            connection.execute(
+                "DELETE FROM sessions WHERE uid IN (SELECT uid FROM sessions"
+                " ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_sessions,),
+            )
+        self.__keep(uid, curve)
+
+    def __delitem__(self, uid: str) -> None:
+        with self._lock:
+            self.curves.pop(uid, None)
+        with self.__connect() as connection:
+            deleted = connection.execute(
+                "DELETE FROM sessions WHERE uid = ?", (uid,)
+            ).rowcount
+        if not deleted:
+            raise KeyError(uid)
+
+    def __len__(self) -> int:
+        with self.__connect() as connection:
+            return connection.execute(
+                "SELECT COUNT(*) FROM sessions WHERE accessed >= ?",
+                (time.time() - self.ttl,),
+            ).fetchone()[0]
+
+
+def create_session_store(config: dict):
+    """Build the session store selected by the SESSION_STORE setting."""
+    if config["SESSION_STORE"] == "memory":
+        return MemorySessionStore(
+            config["SESSION_TTL"], config["SESSION_MAX"], config["SESSION_MAX_MEMORY"]
+        )
+    if config["SESSION_STORE"] == "sqlite":
+        return SQLiteSessionStore(
+            config["SESSION_DATABASE"], config["SESSION_TTL"], config["SESSION_MAX"]
+        )
+    raise ValueError(f"Invalid session store! {config['SESSION_STORE']}")
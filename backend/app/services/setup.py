@@ -1,18 +1,23 @@
 import time
+import random
 import secrets
 import hashlib
 from tabulate import tabulate
 
-from app.services.point_service import Point
+from app.services.point_service import Point, multi_mul
 from app.services.curve_service import Curve
+from app.services.benchmarking import WARMUP_TRIES, measure
 
 
 DELIMITER = "------------------------------------------------------"
 
 class Setup:
-    def __init__(self, ec: "Curve", simulation: bool = False):
+    def __init__(self, ec: "Curve", simulation: bool = False, rng=None):
         self.ec = ec
         self.simulation = simulation
+        # Random source of the keys; a seeded random.Random makes runs
+        # reproducible for benchmarking.
+        self.rng = rng if rng is not None else secrets.SystemRandom()
         self.c1 = None
         self.c2 = None
 
@@ -25,10 +30,16 @@ class Setup:
 
     def __attack(self, a, b, h, e, V, v, M1, M2) -> tuple:
         ec = self.ec
-        Z1 = M1 * a + M1 * b * v
+        Z1 = M1 * (a + b * v)
+        H = ec.base * h
+        E = V * e
         for j in range(2):
             for u in range(2):
-                Z2 = Z1 + ec.base * h * j + V * e * u
+                Z2 = Z1
+                if j:
+                    Z2 = Z2 + H
+                if u:
+                    Z2 = Z2 + E
                 c2_attempt = Setup.hash_point(Z2)
                 if ec.base * c2_attempt == M2:
                     return c2_attempt
@@ -52,7 +63,7 @@ class Setup:
             print(DELIMITER)
             time.sleep(0.1)
 
-        self.c1 = secrets.randbelow(self.ec.n - 2) + 2
+        self.c1 = self.rng.randrange(self.ec.n - 2) + 2
         M1 = self.__public_key(self.c1)
 
         if display:
@@ -60,16 +71,16 @@ class Setup:
             print(DELIMITER)
             time.sleep(0.1)
 
-        v = secrets.randbelow(self.ec.n - 2) + 2
+        v = self.rng.randrange(self.ec.n - 2) + 2
         V = self.__public_key(v)
         if display:
             print(f"Public key V generated", flush=True)
             print(DELIMITER)
             time.sleep(0.1)
 
-        a, b, h, e = [(secrets.randbelow(self.ec.n - 1) + 1) for _ in range(4)]
-        j = secrets.randbelow(2)
-        u = secrets.randbelow(2)
+        a, b, h, e = [(self.rng.randrange(self.ec.n - 1) + 1) for _ in range(4)]
+        j = self.rng.randrange(2)
+        u = self.rng.randrange(2)
         if display:
             print(f"Generating random values", flush=True)
             time.sleep(0.1)
@@ -85,7 +96,7 @@ class Setup:
             time.sleep(0.2)
 
         ec = self.ec
-        Z = M1 * a + V * b * self.c1 + ec.base * h * j + V * e * u
+        Z = multi_mul([(M1, a), (V, b * self.c1 + e * u), (ec.base, h * j)])
         self.c2 = Setup.hash_point(Z)
 
         M2 = self.__public_key(self.c2)
@@ -105,10 +116,9 @@ class Setup:
         successes = [0 for _ in range(len(ec_params))]
         success_rates = [0 for _ in range(len(ec_params))]
         for params, base_point in zip(ec_params, base_points):
-            attacker = Setup(Curve(params[0], params[1]))
-            attacker.ec.field = params[2]
+            attacker = Setup(Curve(params[0], params[1], params[2]))
             attacker.ec.n = params[3]
-            attacker.ec.base = Point(attacker.ec.a, attacker.ec.field, *base_point)
+            attacker.ec.base = Point(attacker.ec, *base_point)
             success_count = 0
 
             for _ in range(num_tries):
@@ -166,37 +176,49 @@ class Setup:
         print(tabulate(table_data, headers="firstrow", tablefmt="grid"))
 
     @staticmethod
-    def benchmark(curves: list, num_tries: int = 50) -> list:
+    def benchmark(
+        curves: list,
+        num_tries: int = 50,
+        warmup: int = WARMUP_TRIES,
+        seed: int = None,
+        stop=None,
+    ) -> list:
         results = []
         for curve in curves:
-            attacker = Setup(Curve(int(curve.a), int(curve.b), int(curve.field)))
-            attacker.ec.base = Point(attacker.ec, int(curve.base.x), int(curve.base.y))
-            attacker.ec.n = int(curve.n)
-            success_count = 0
-            start_time = time.time()
-            for _ in range(num_tries):
-                try:
-                    if attacker.generate_keys(False):
-                        success_count += 1
-                except Exception:
-                    continue
-            end_time = time.time()
-            elapsed_time = end_time - start_time
-            results.append((success_count, success_count / num_tries, elapsed_time))
+
+            def prepare():
+                rng = random.Random(seed) if seed is not None else None
+                attacker = Setup(
+                    Curve(int(curve.a), int(curve.b), int(curve.field)), rng=rng
+                )
+                attacker.ec.base = Point(
+                    attacker.ec, int(curve.base.x), int(curve.base.y)
+                )
+                attacker.ec.n = int(curve.n)
+
+                def attempt() -> bool:
+                    try:
+                        return attacker.generate_keys(False)
+                    except Exception:
+                        return False
+
+                return attempt
+
+            results.append(measure(prepare, num_tries, warmup, stop=stop))
         return results
 
 def test_setup():
     # SECP256k1
-    ec = Curve(0, 7)
-    ec.field = (
-        115792089237316195423570985008687907853269984665640564039457584007908834671663
+    ec = Curve(
+        0,
+        7,
+        115792089237316195423570985008687907853269984665640564039457584007908834671663,
     )
     ec.n = (
         115792089237316195423570985008687907852837564279074904382605163141518161494337
     )
     ec.base = Point(
-        0,
-        ec.field,
+        ec,
         79086247176140945631788741473243917373392091539978947803256065440939503345144,
         46592427867154248619823560021064937204868064911504510519907326227152259586360,
     )
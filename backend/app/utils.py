@@ -1,21 +1,59 @@
-def gcd(a: int, b: int) -> int:
-    while b:
-        a, b = b, a % b
-    return a
+def mod_inverse(a: int, m: int) -> int:
+    """Inverse of a modulo m; raises ValueError if a is not invertible."""
+    try:
+        return pow(a, -1, m)
+    except ValueError:
+        raise ValueError(f"{a} has no inverse modulo {m}!") from None
 
-def simplify_fraction(fraction: tuple) -> tuple:
-    num, den = fraction
-    if den == 0:
-        return (-1, -1)
-    if num == 0:
-        return (0, 1)
-    common = gcd(num, den)
-    return (num // common, den // common)
+def batch_inverse(values: list, m: int) -> list:
+    """Inverses of all the values modulo m with a single modular inversion.
 
-def euclid_extended(a: int, b: int) -> tuple:
-    if a == 0:
-        return (b, 0, 1)
-    g, y, x = euclid_extended(b % a, a)
-    s = 1 if a > 0 else -1
-    t = 1 if b > 0 else -1
-    return (g, x - ((b // a) * y) * s, y * t)
+    Montgomery's trick: invert the product of the values and peel each
+    inverse off with the prefix products, for three multiplications per value.
+    """
+    prefix = []
+    product = 1
+    for value in values:
+        product = (product * value) % m
+        prefix.append(product)
+    if not prefix:
+        return []
+    inverse = mod_inverse(product, m)
+    inverses = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        inverses[i] = (inverse * prefix[i - 1]) % m
+        inverse = (inverse * values[i]) % m
+    inverses[0] = inverse
+    return inverses
+
+def legendre(a: int, p: int) -> int:
+    """Legendre symbol (a / p) for an odd prime p: 1, -1 or 0."""
+    symbol = pow(a, (p - 1) // 2, p)
+    return -1 if symbol == p - 1 else symbol
+
+def sqrt_mod(a: int, p: int) -> int:
+    """Smallest square root of a modulo the prime p (Tonelli-Shanks), or None."""
+    a %= p
+    if a == 0 or p == 2:
+        return a
+    if legendre(a, p) != 1:
+        return None
+    if p % 4 == 3:
+        root = pow(a, (p + 1) // 4, p)
+        return min(root, p - root)
+
+    q, s = p - 1, 0
+    while q % 2 == 0:
+        q, s = q // 2, s + 1
+    z = 2
+    while legendre(z, p) != -1:
+        z += 1
+    m, c, t, root = s, pow(z, q, p), pow(a, q, p), pow(a, (q + 1) // 2, p)
+    while t != 1:
+        i, t2 = 0, t
+        while t2 != 1:
+            t2, i = (t2 * t2) % p, i + 1
+        b = pow(c, 1 << (m - i - 1), p)
+        m, c = i, (b * b) % p
+        t, root = (t * c) % p, (root * b) % p
+    return min(root, p - root)
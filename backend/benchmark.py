@@ -0,0 +1,94 @@
+"""Run an attack benchmark from the command line.
+
+The curves are read from a JSON file holding a list of specifications in
+the shape used by the benchmark executor, for example:
+
+    [{"a": 2, "b": 2, "field": 17, "n": 19, "base": [5, 1], "point_a": [10, 6]}]
+
+Curves of the catalogue can be referenced by id instead, with any of those
+keys overriding the catalogue's values:
+
+    [{"curveId": "smooth48-1"}, {"curveId": "toy-17", "point_a": [10, 6]}]
+
+Usage:
+    python benchmark.py "Pohlig-Hellman" curves.json --tries 50 --seed 1 \
+        --output results.csv
+"""
+import sys
+import json
+import random
+import secrets
+import argparse
+
+from app.services.benchmark_executor import (
+    ATTACKS,
+    CACHED_ATTACKS,
+    SEEDED_ATTACKS,
+    BenchmarkExecutor,
+    catalogue_spec,
+)
+from app.services.benchmarking import WARMUP_TRIES, export_csv, export_json
+
+
+def benchmark_rows(algorithm: str, specs: list, results: list) -> list:
+    return [
+        {
+            "attack": algorithm,
+            "curve": i + 1,
+            "a": spec["a"],
+            "b": spec["b"],
+            "field": spec["field"],
+            **result.to_dict(),
+        }
+        for i, (spec, result) in enumerate(zip(specs, results))
+    ]
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark an attack on a set of curves.")
+    parser.add_argument("attack", choices=list(ATTACKS))
+    parser.add_argument("curves", help="JSON file with the curve specifications")
+    parser.add_argument("--tries", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=WARMUP_TRIES)
+    parser.add_argument("--seed", type=int, help=f"only for {', '.join(SEEDED_ATTACKS)}")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="solve every try from scratch; "
+                        f"{', '.join(CACHED_ATTACKS)} only")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--memory-budget", type=int, help="Baby-Step Giant-Step only")
+    parser.add_argument("--output", help="write the results to a .csv or .json file")
+    args = parser.parse_args(argv)
+
+    with open(args.curves) as file:
+        specs = json.load(file)
+    rng = random.Random(args.seed) if args.seed is not None else secrets.SystemRandom()
+    specs = [catalogue_spec(args.attack, spec, rng) for spec in specs]
+    options = {"warmup": args.warmup}
+    if args.seed is not None and args.attack in SEEDED_ATTACKS:
+        options["seed"] = args.seed
+    if args.no_cache and args.attack in CACHED_ATTACKS:
+        options["cache"] = False
+    if args.memory_budget is not None and args.attack == "Baby-Step Giant-Step":
+        options["memory_budget"] = args.memory_budget
+
+    executor = BenchmarkExecutor(args.workers)
+    try:
+        results = executor.run(args.attack, specs, args.tries, **options)
+    finally:
+        executor.shutdown()
+    rows = benchmark_rows(args.attack, specs, results)
+
+    if args.output is None:
+        export_json(rows, sys.stdout)
+        print()
+    else:
+        with open(args.output, "w", newline="") as file:
+            if args.output.endswith(".csv"):
+                export_csv(rows, file)
+            else:
+                export_json(rows, file)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
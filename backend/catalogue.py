@@ -0,0 +1,88 @@
+"""Check, list and extend the curve catalogue.
+
+Every entry is checked on its own: the base point is on the curve, n is its
+order and the product of the stored factors, and, on fields small enough to
+count points, n * cofactor is the number of points.
+
+Usage:
+    python catalogue.py                              # check and list the curves
+    python catalogue.py --add toy-97 2 3 97          # add a curve, generator found
+    python catalogue.py --add toy-97 2 3 97 --base 3 6
+    python catalogue.py --smooth 48 --bound 65536 --seed 1
+"""
+import sys
+import random
+import argparse
+import secrets
+from tabulate import tabulate
+
+from app.services.curve_catalogue import (
+    CATALOGUE_PATH,
+    check_entry,
+    describe_curve,
+    load_catalogue,
+    save_catalogue,
+    smooth_curve,
+)
+
+
+def smooth_id(entries: dict, bits: int) -> str:
+    i = 1
+    while f"smooth{bits}-{i}" in entries:
+        i += 1
+    return f"smooth{bits}-{i}"
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Check, list and extend the curve catalogue.")
+    parser.add_argument("--catalogue", default=CATALOGUE_PATH)
+    parser.add_argument("--add", nargs=4, metavar=("ID", "A", "B", "FIELD"),
+                        help="add a curve whose points can be counted")
+    parser.add_argument("--base", nargs=2, type=int, metavar=("X", "Y"),
+                        help="generator of the added curve")
+    parser.add_argument("--name", help="description of the added curve")
+    parser.add_argument("--smooth", type=int, metavar="BITS",
+                        help="add a random curve over a field of BITS bits with a smooth order")
+    parser.add_argument("--bound", type=int, default=1 << 16,
+                        help="largest prime factor of the order of --smooth curves")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    entries = load_catalogue(args.catalogue)
+    rng = random.Random(args.seed) if args.seed is not None else secrets.SystemRandom()
+    added = None
+    if args.add:
+        curve_id, a, b, field = args.add[0], *map(int, args.add[1:])
+        if curve_id in entries:
+            print(f"Curve {curve_id} is already in the catalogue")
+            return 1
+        name = args.name or f"y^2 = x^3 + {a}x + {b} over F_{field}"
+        added = describe_curve(curve_id, name, a, b, field, args.base, rng)
+    elif args.smooth:
+        added = smooth_curve(smooth_id(entries, args.smooth), args.smooth, args.bound, rng)
+    if added is not None:
+        entries[added.id] = added
+        save_catalogue(list(entries.values()), args.catalogue)
+        print(f"Curve {added.id} added to {args.catalogue}")
+
+    invalid = 0
+    table_data = [["Id", "Field bits", "n bits", "Cofactor", "Largest factor bits", "Status"]]
+    for entry in entries.values():
+        errors = check_entry(entry)
+        invalid += bool(errors)
+        table_data.append(
+            [
+                entry.id,
+                entry.field.bit_length(),
+                entry.n.bit_length(),
+                entry.cofactor,
+                max(entry.factors).bit_length(),
+                "; ".join(errors) or "ok",
+            ]
+        )
+    print(tabulate(table_data, headers="firstrow", tablefmt="grid"))
+    return 1 if invalid else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,6 +9,22 @@ class Config:
     HOST = str(os.environ.get('HOST', 'localhost'))
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'you-will-never-guess'
     PORT = int(os.environ.get('PORT', 5000))
+    POINTS_PAGE_LIMIT = int(os.environ.get('POINTS_PAGE_LIMIT', 10000))
+    STEPS_LIMIT = int(os.environ.get('STEPS_LIMIT', 1000))
+    ENCRYPT_BULK_LIMIT = int(os.environ.get('ENCRYPT_BULK_LIMIT', 1000000))
+    CURVE_CATALOGUE = os.environ.get('CURVE_CATALOGUE', os.path.join(basedir, 'catalogue', 'curves.json'))
+    ATTACK_WORK_LIMIT = int(os.environ.get('ATTACK_WORK_LIMIT', 1 << 20))
+    BSGS_MEMORY_BUDGET = int(os.environ.get('BSGS_MEMORY_BUDGET', 64 * 1024 * 1024))
+    BENCHMARK_WORKERS = int(os.environ.get('BENCHMARK_WORKERS', os.cpu_count() or 1))
+    BENCHMARK_JOB_WORKERS = int(os.environ.get('BENCHMARK_JOB_WORKERS', BENCHMARK_WORKERS))
+    BENCHMARK_JOB_RETENTION = int(os.environ.get('BENCHMARK_JOB_RETENTION', 3600))
+    SESSION_STORE = os.environ.get('SESSION_STORE', 'memory')
+    SESSION_DATABASE = os.environ.get('SESSION_DATABASE', os.path.join(basedir, 'sessions.db'))
+    SESSION_TTL = int(os.environ.get('SESSION_TTL', 3600))
+    SESSION_MAX = int(os.environ.get('SESSION_MAX', 1000))
+    SESSION_MAX_MEMORY = int(os.environ.get('SESSION_MAX_MEMORY', 256 * 1024 * 1024))
+    INSTRUMENTATION = os.environ.get('INSTRUMENTATION', 'false').lower() in ['1', 'true']
+    PROFILE_DIR = os.environ.get('PROFILE_DIR', os.path.join(basedir, 'profiles'))
     DEBUG = False
     TESTING = False
 
@@ -0,0 +1,271 @@
+"""Performance regression check of the point arithmetic and attack hot paths.
+
+Every case is timed with the benchmarking harness. The speed of a shared
+machine drifts by tens of percent within seconds, so each try runs between
+two runs of a fixed calibration workload and is measured in units of
+their mean; the median of these relative times is compared with the
+stored baseline. The run fails when a case is slower than its baseline by
+more than the threshold and by more than an absolute floor, or when a
+point arithmetic or curve case, or an attack that always finds the
+logarithm, computes a wrong result.
+
+Baselines depend on the machine, so record them again with --update
+before comparing on a new one, and together with any change that affects
+the timings.
+
+Usage:
+    python regression.py                  # compare with the baseline
+    python regression.py --update         # record a new baseline
+    python regression.py --filter point_  # only the matching cases
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from tabulate import tabulate
+
+from app.services.point_service import Point
+from app.services.curve_service import Curve, curve_artifacts
+from app.services.benchmark_executor import (
+    ATTACKS,
+    CACHED_ATTACKS,
+    SEEDED_ATTACKS,
+    build_entry,
+)
+from app.services.benchmarking import BenchmarkResult, measure, percentile
+from app.utils import sqrt_mod
+
+BENCHMARKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmarks")
+CORPUS = os.path.join(BENCHMARKS_DIR, "corpus.json")
+BASELINE = os.path.join(BENCHMARKS_DIR, "baseline.json")
+THRESHOLD = 0.3
+# Slowdowns below this many milliseconds are timer and scheduling noise
+FLOOR = 0.05
+# Modular multiplications of the calibration workload
+CALIBRATION_STEPS = 5000
+SEED = 19
+# Attacks that solve every logarithm of the corpus, unlike the randomised ones
+EXACT_ATTACKS = ["Pohlig-Hellman", "Baby-Step Giant-Step"]
+
+# Curves of the point arithmetic cases by field size in bits
+CURVES = {
+    16: (2, 3, 65521),
+    64: (2, 3, 18446744073709551557),
+    256: (0, 7, 2**256 - 2**32 - 977),
+}
+# Curve with b = 0 and a point of order 260 whose multiples include (0, 0),
+# the order-2 point, to check the steps against plain multiplication.
+STEPS_CURVE = (1, 0, 1009)
+STEPS_POINT = (3, 78)
+STEPS_ORDER = 260
+# Operations per timed try of the point arithmetic cases, so a try is long
+# enough to be measured reliably.
+ADDITIONS = 1000
+MULTIPLICATIONS = 50
+MESSAGE_LENGTH = 10000
+ALPHABET = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 .,"
+
+
+def curve_point(a: int, b: int, field: int) -> "Point":
+    curve = Curve(a, b, field)
+    x = 1
+    while sqrt_mod(x**3 + a * x + b, field) is None:
+        x += 1
+    return Point(curve, x, sqrt_mod(x**3 + a * x + b, field))
+
+
+def calibration() -> bool:
+    """Plain modular arithmetic, independent of the code under test."""
+    x, p = 1, 2**61 - 1
+    for i in range(CALIBRATION_STEPS):
+        x = (x * 48271 + i) % p
+    return x > 0
+
+
+def calibration_time() -> int:
+    start = time.perf_counter_ns()
+    calibration()
+    return time.perf_counter_ns() - start
+
+
+def calibrated(run) -> tuple:
+    """Call `run`, which benchmarks a single try, between two calibration
+    runs; return its BenchmarkResult and the try's relative time."""
+    before = calibration_time()
+    result = run()
+    after = calibration_time()
+    return result, result.timings[0] * 2 / (before + after)
+
+
+def point_cases(rng: "random.Random") -> dict:
+    cases = {}
+    for bits, (a, b, field) in CURVES.items():
+        P = curve_point(a, b, field)
+        Q = P * rng.randrange(2, field)
+        scalars = [rng.randrange(1, field) for _ in range(MULTIPLICATIONS)]
+
+        def add(P=P, Q=Q):
+            result = P
+            for _ in range(ADDITIONS):
+                result = result + Q
+            return True
+
+        def mul(P=P, scalars=scalars):
+            for scalar in scalars:
+                P * scalar
+            return True
+
+        cases[f"point_add_{bits}"] = lambda add=add: add
+        cases[f"point_mul_{bits}"] = lambda mul=mul: mul
+    return cases
+
+
+def curve_cases(rng: "random.Random") -> dict:
+    a, b, field = CURVES[16]
+
+    def calculate_points():
+        # Start from scratch instead of reading the shared point list
+        curve_artifacts.cache_clear()
+        Curve(a, b, field).calculate_points()
+        return True
+
+    curve = Curve(a, b, field)
+    message = "".join(rng.choice(ALPHABET) for _ in range(MESSAGE_LENGTH))
+    encoded = curve.encode(ALPHABET, message)
+
+    steps_curve = Curve(*STEPS_CURVE)
+    point = Point(steps_curve, *STEPS_POINT)
+    # Four times round the subgroup, so the steps are also computed in batches
+    scalar = 4 * STEPS_ORDER
+    multiples = [point * i for i in range(1, scalar + 1)]
+    multiples = [multiple for multiple in multiples if not multiple.at_infinity()]
+
+    def steps():
+        return (
+            list(steps_curve.steps(point, STEPS_ORDER)) == multiples[: STEPS_ORDER - 1]
+            and list(steps_curve.steps(point, scalar)) == multiples
+        )
+
+    return {
+        "calculate_points": lambda: calculate_points,
+        "encode": lambda: lambda: curve.encode(ALPHABET, message) is not None,
+        "decode": lambda: lambda: curve.decode(ALPHABET, encoded) == message,
+        "steps_b0": lambda: steps,
+    }
+
+
+def attack_runs(corpus: list, warmup: int, selected) -> dict:
+    """Callables benchmarking one try of every attack on every curve of the
+    corpus, by case."""
+    runs = {}
+    for algorithm, attack in ATTACKS.items():
+        options = {"warmup": warmup}
+        # Every try is benchmarked on its own, so seeded attacks repeat the
+        # same random choices and the same work on each of them
+        if algorithm in SEEDED_ATTACKS:
+            options["seed"] = SEED
+        # Every try solves from scratch, or only cache lookups would be timed
+        if algorithm in CACHED_ATTACKS:
+            options["cache"] = False
+        for i, spec in enumerate(corpus):
+            name = f"{algorithm} [{i + 1}]"
+            if selected(name):
+                entry = build_entry(algorithm, spec)
+                runs[name] = lambda attack=attack, entry=entry, options=options: (
+                    attack.benchmark([entry], 1, **options)[0]
+                )
+    return runs
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Check hot paths for performance regressions.")
+    parser.add_argument("--baseline", default=BASELINE)
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="allowed slowdown of the median, 0.3 being 30%%")
+    parser.add_argument("--floor", type=float, default=FLOOR,
+                        help="slowdowns below this many milliseconds are ignored")
+    parser.add_argument("--tries", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=1, help="untimed tries before each try")
+    parser.add_argument("--filter", default="", help="only cases containing this text")
+    parser.add_argument("--update", action="store_true", help="record a new baseline")
+    args = parser.parse_args(argv)
+
+    def selected(name: str) -> bool:
+        return args.filter in name
+
+    rng = random.Random(SEED)
+    cases = {
+        name: prepare
+        for name, prepare in {**point_cases(rng), **curve_cases(rng)}.items()
+        if selected(name)
+    }
+    with open(args.corpus) as file:
+        corpus = json.load(file)
+    runs = {
+        name: lambda prepare=prepare: measure(prepare, 1, args.warmup)
+        for name, prepare in cases.items()
+    }
+    runs.update(attack_runs(corpus, args.warmup, selected))
+    tries = {name: [calibrated(run) for _ in range(args.tries)] for name, run in runs.items()}
+    results = {
+        name: BenchmarkResult.merge([result for result, _ in case_tries])
+        for name, case_tries in tries.items()
+    }
+    relative = {
+        name: percentile(sorted(ratio for _, ratio in case_tries), 50)
+        for name, case_tries in tries.items()
+    }
+    failures = [
+        name
+        for name, result in results.items()
+        if (name in cases or name.split(" [")[0] in EXACT_ATTACKS) and result.rate < 1
+    ]
+    medians = {name: result.stats()["p50"] for name, result in results.items()}
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+
+    if args.update:
+        baseline.update(
+            {name: {"p50": medians[name], "relative": relative[name]} for name in results}
+        )
+        with open(args.baseline, "w") as file:
+            json.dump(baseline, file, indent=4, sort_keys=True)
+            file.write("\n")
+        print(f"Baseline of {len(results)} cases written to {args.baseline}")
+        return 0
+
+    regressions = 0
+    table_data = [["Case", "p50 (ms)", "Relative", "Baseline", "Change", "Status"]]
+    for name, median in medians.items():
+        row = [name, f"{median:.4f}", f"{relative[name]:.4f}"]
+        if name not in baseline:
+            table_data.append(row + ["-", "-", "new"])
+            continue
+        reference = baseline[name]["relative"]
+        change = relative[name] / reference - 1 if reference else 0.0
+        # The slowdown in milliseconds at the current speed of the machine
+        slowdown = median * (1 - reference / relative[name])
+        status = "ok"
+        if change > args.threshold and slowdown > args.floor:
+            status = "SLOWER"
+            regressions += 1
+        table_data.append(row + [f"{reference:.4f}", f"{change:+.1%}", status])
+    print(tabulate(table_data, headers="firstrow", tablefmt="grid"))
+    if failures:
+        print(f"Wrong results in: {', '.join(failures)}")
+    if regressions:
+        print(
+            f"{regressions} case(s) slower than the baseline by more than "
+            f"{args.threshold:.0%} and {args.floor} ms"
+        )
+    return 1 if failures or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,7 +18,7 @@ import { AttacksService } from '@app/services/attacks.service';
 
 export class AttacksComponent implements OnInit {
     attackForm: FormGroup;
-    attackTypes: string[] = ['SETUP', 'Pohlig-Hellman', 'Baby-Step Giant-Step'];
+    attackTypes: string[] = ['SETUP', 'Pohlig-Hellman', 'Baby-Step Giant-Step', "Pollard's Rho", "Pollard's Kangaroo"];
     attackResults: MatTableDataSource<any> = new MatTableDataSource<any>();
 
     selectedAttack: string = String();
@@ -139,7 +139,7 @@ export class AttacksComponent implements OnInit {
                         n: ['', [Validators.required, Validators.min(1)]],
                         base: ['', [Validators.required]],
                     }
-                    if (this.selectedAttack === 'Pohlig-Hellman' || this.selectedAttack === 'Baby-Step Giant-Step')
+                    if (this.selectedAttack !== 'SETUP')
                         Object.assign(params, { point_a: ['', [Validators.required]] });
                     if (this.selectedAttack === 'Baby-Step Giant-Step')
                         Object.assign(params, { m: ['', [Validators.required]] });
@@ -159,7 +159,7 @@ export class AttacksComponent implements OnInit {
                         n: [curveData.n.toString(), [Validators.required, Validators.min(1)]],
                         base: [`(${curveData.base.x.toString()},${curveData.base.y.toString()})`, [Validators.required]],
                     }
-                    if (this.selectedAttack === 'Pohlig-Hellman' || this.selectedAttack === 'Baby-Step Giant-Step')
+                    if (this.selectedAttack !== 'SETUP')
                         Object.assign(data, { point_a: [`(${curveData.point_a.x.toString()},${curveData.point_a.y.toString()})`, [Validators.required]] });
                     if (this.selectedAttack === 'Baby-Step Giant-Step')
                         Object.assign(data, { m: [curveData.m.toString(), [Validators.required]] });
@@ -212,7 +212,7 @@ export class AttacksComponent implements OnInit {
             const n = curve.get('n')?.value;
             const m = curve.get('m')?.value;
             const base = Point.fromString(curve.get('base')?.value);
-            if (this.selectedAttack === 'Pohlig-Hellman' || this.selectedAttack === 'Baby-Step Giant-Step') {
+            if (this.selectedAttack !== 'SETUP') {
                 const point_a = Point.fromString(curve.get('point_a')?.value);
                 curves.push({ a, b, field, n, m, base, point_a });
             }
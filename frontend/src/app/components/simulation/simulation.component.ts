@@ -168,12 +168,25 @@ export class SimulationComponent implements OnInit {
                     console.log(curve_res.body);
                     this.drawCChart();
                     this.loading_points = true;
-                    const points_res: HttpResponse<any> = await firstValueFrom(this.curveService.getPoints(this.uid));
-                    if (points_res.status === 200) {
-                        this.points = points_res.body.points.map((data: string) => {
+                    // Points come in pages; follow "next" until every page is read
+                    let points: Point[] = [];
+                    let start: number | null = 0;
+                    while (start !== null) {
+                        const points_res: HttpResponse<any> = await firstValueFrom(this.curveService.getPoints(this.uid, start));
+                        if (points_res.status !== 200) break;
+                        // A failure while the page was streamed is reported in the body
+                        if (points_res.body.error) {
+                            console.log(points_res.body.error);
+                            break;
+                        }
+                        points = points.concat(points_res.body.points.map((data: string) => {
                             const point = JSON.parse(data);
                             return new Point(point.x, point.y);
-                        });
+                        }));
+                        start = points_res.body.next;
+                    }
+                    if (start === null) {
+                        this.points = points;
                         this.drawPChart();
                     }
                 }
@@ -307,36 +320,54 @@ export class SimulationComponent implements OnInit {
 
     async getPublicKey(i: number, privateKey: number, partyDetailsArray: FormArray): Promise<void> {
         if (partyDetailsArray.at(i).get('private_key')?.valid) {
-            await this.curveService.getPublicKey(this.uid, i, privateKey).subscribe((res: HttpResponse<any>) => {
-                if (res.status === 200) {
-                    console.log(res.body.message);
-                    let publicKey = JSON.parse(res.body.public_key);
-                    partyDetailsArray.at(i).get('public_key')?.setValue(`(${publicKey.x}, ${publicKey.y})`);
-                    let steps: Point[] = [];
+            try {
+                // Steps come in pages; follow "steps_next" until every page is read
+                let steps: Point[] = [];
+                let stepsOffset: number | null = 0;
+                while (stepsOffset !== null) {
+                    const res: HttpResponse<any> = await firstValueFrom(this.curveService.getPublicKey(this.uid, i, privateKey, stepsOffset));
+                    if (res.status === 204) {
+                        console.log("Invalid private key");
+                        partyDetailsArray.at(i).get('public_key')?.setValue('(O)');
+                        return Promise.resolve();
+                    }
+                    if (res.status !== 200) return Promise.resolve();
+                    if (res.body.error) {
+                        console.log(res.body.error);
+                        return Promise.resolve();
+                    }
+                    if (stepsOffset === 0) {
+                        console.log(res.body.message);
+                        let publicKey = JSON.parse(res.body.public_key);
+                        partyDetailsArray.at(i).get('public_key')?.setValue(`(${publicKey.x}, ${publicKey.y})`);
+                    }
                     res.body.steps.forEach((step: string) => {
                         steps.push(new Point(JSON.parse(step).x, JSON.parse(step).y));
                     });
-                    // Search dataset with label "Steps" and remove it
-                    this.p_chart.data.datasets = this.p_chart.data.datasets.filter((dataset: any) => dataset.label !== `Steps for Party ${i + 1}`);
-                    this.p_chart.update();
-
-                    this.p_chart.data.datasets.push({
-                        type: "line",
-                        label: `Steps for Party ${i + 1}`,
-                        data: steps,
-                        backgroundColor: "rgba(255, 240, 0, 1)",
-                        borderColor: "rgba(255, 240, 0, 0.5)",
-                        order: 98,
-                        animation: false,
-                        fill: false,
-                    });
-                    this.p_chart.update();
+                    stepsOffset = res.body.steps_next;
                 }
-                else if (res.status === 204) {
-                    console.log("Invalid private key");
-                    partyDetailsArray.at(i).get('public_key')?.setValue('(O)');
+                // Search dataset with label "Steps" and remove it
+                this.p_chart.data.datasets = this.p_chart.data.datasets.filter((dataset: any) => dataset.label !== `Steps for Party ${i + 1}`);
+                this.p_chart.update();
+
+                this.p_chart.data.datasets.push({
+                    type: "line",
+                    label: `Steps for Party ${i + 1}`,
+                    data: steps,
+                    backgroundColor: "rgba(255, 240, 0, 1)",
+                    borderColor: "rgba(255, 240, 0, 0.5)",
+                    order: 98,
+                    animation: false,
+                    fill: false,
+                });
+                this.p_chart.update();
+            }
+            catch (error: any) {
+                if (error.status === 400 || error.status === 404) {
+                    const errorMessage = error.error || 'An error occurred';
+                    console.log(errorMessage);
                 }
-            });
+            }
         }
         return Promise.resolve();
     }
@@ -14,16 +14,16 @@ export class CurveService {
         return this.http.post<string>(`${this.curveURL}/api/curve`, { uid, a, b, field }, { observe: 'response' });
     }
 
-    getPoints(uid: string): Observable<HttpResponse<any>> {
-        return this.http.get<any>(`${this.curveURL}/api/curve/points`, { params: { uid }, observe: 'response' });
+    getPoints(uid: string, start: number = 0): Observable<HttpResponse<any>> {
+        return this.http.get<any>(`${this.curveURL}/api/curve/points`, { params: { uid, start }, observe: 'response' });
     }
 
     setBase(uid: string, base: Point): Observable<HttpResponse<any>> {
         return this.http.post<any>(`${this.curveURL}/api/curve/base`, { uid, x: base.x, y: base.y }, { observe: 'response' });
     }
 
-    getPublicKey(uid: string, i: number, privateKey: number): Observable<HttpResponse<any>> {
-        return this.http.post<any>(`${this.curveURL}/api/curve/public`, { uid, i, privateKey }, { observe: 'response' });
+    getPublicKey(uid: string, i: number, privateKey: number, stepsOffset: number = 0): Observable<HttpResponse<any>> {
+        return this.http.post<any>(`${this.curveURL}/api/curve/public`, { uid, i, privateKey, stepsOffset }, { observe: 'response' });
     }
 
     getSharedKey(uid: string, privateKey: number, sharedKey: string): Observable<HttpResponse<any>> {